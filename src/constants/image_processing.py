@@ -13,6 +13,8 @@ DEFAULT_CONTOUR_LINE_WIDTH = 2
 DEFAULT_CONTOUR_FILL_COLOR = (255, 255, 255)
 DEFAULT_CONTOUR_FILL_WIDTH = 10
 DEFAULT_BORDER_REMOVE = 5
+# The image stacks are only saved for debugging, so a lower quality suffices
+DEBUG_STACK_JPEG_QUALITY = 70
 
 DEFAULT_GAUSSIAN_BLUR_PARAMS_MARKER = {"kernel_size": (5, 5), "sigma_x": 0}
 
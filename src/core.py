@@ -1,9 +1,7 @@
 import os
-from collections import defaultdict
-from typing import Any
+from functools import lru_cache
 
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 
 from src.constants.common import (
@@ -14,51 +12,97 @@ from src.constants.common import (
     GLOBAL_PAGE_THRESHOLD_WHITE,
     TEXT_SIZE,
 )
+from src.constants.image_processing import DEBUG_STACK_JPEG_QUALITY
 from src.logger import logger
 from src.utils.image import CLAHE_HELPER, ImageUtils
 from src.utils.interaction import InteractionUtils
 
+BOX_TYPE_NAMES = {
+    "int": "Integer",
+    "mcq": "MCQ",
+    "med": "MED",
+    "rol": "Roll",
+}
+# Structuring elements of the auto alignment, shared by all sheets
+ALIGN_V_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 10))
+ALIGN_ERODE_KERNEL = np.ones((5, 5), np.uint8)
+
 
 class ImageInstanceOps:
     """Class to hold fine-tuned utilities for a group of images. One instance for each processing directory."""
 
-    save_img_list: Any = defaultdict(list)
-
     def __init__(self, tuning_config):
         super().__init__()
         self.tuning_config = tuning_config
         self.save_image_level = tuning_config.outputs.save_image_level
+        # One list of images for each save level (index 0 is unused)
+        self.save_img_list = [[] for _ in range(self.save_image_level + 1)]
+        # All sheets of the template share the page shape, so the resized page
+        # is written into the previous sheet's buffer
+        self.page_img = None
+        self.setup_threshold_params(tuning_config.threshold_params)
+
+    def setup_threshold_params(self, threshold_params):
+        # Resolved once here as the thresholds are computed for every strip of every file
+        (
+            page_type_for_threshold,
+            self.min_gap,
+            self.min_jump,
+            self.jump_delta,
+            confident_surplus,
+        ) = map(
+            threshold_params.get,
+            [
+                "PAGE_TYPE_FOR_THRESHOLD",
+                "MIN_GAP",
+                "MIN_JUMP",
+                "JUMP_DELTA",
+                "CONFIDENT_SURPLUS",
+            ],
+        )
+        self.global_default_threshold = (
+            GLOBAL_PAGE_THRESHOLD_WHITE
+            if page_type_for_threshold == "white"
+            else GLOBAL_PAGE_THRESHOLD_BLACK
+        )
+        self.confident_jump = self.min_jump + confident_surplus
 
     def apply_preprocessors(self, file_path, in_omr, template):
-        tuning_config = self.tuning_config
-        # resize to conform to template
-        in_omr = ImageUtils.resize_util(
-            in_omr,
-            tuning_config.dimensions.processing_width,
-            tuning_config.dimensions.processing_height,
-        )
+        dimensions = self.tuning_config.dimensions
+        processing_shape = (dimensions.processing_height, dimensions.processing_width)
+        # resize to conform to template, unless the image already does (the
+        # callers don't reuse their image after preprocessing, so no copy is made)
+        if in_omr.shape[:2] != processing_shape:
+            in_omr = ImageUtils.resize_util(
+                in_omr, dimensions.processing_width, dimensions.processing_height
+            )
 
         # run pre_processors in sequence
         for pre_processor in template.pre_processors:
             in_omr = pre_processor.apply_filter(in_omr, file_path)
         return in_omr
 
-    def read_omr_response(self, template, image, name, save_dir=None):
+    def read_omr_response(
+        self, template, image, name, save_dir=None, image_writer=None
+    ):
         config = self.tuning_config
         auto_align = config.alignment_params.auto_align
+        show_image_level = config.outputs.show_image_level
         try:
-            img = image.copy()
-            # origDim = img.shape[:2]
-            img = ImageUtils.resize_util(
-                img, template.page_dimensions[0], template.page_dimensions[1]
+            # origDim = image.shape[:2]
+            # Resized into the page buffer, the input is left untouched
+            img = self.page_img = cv2.resize(
+                image, tuple(template.page_dimensions), dst=self.page_img
             )
-            if img.max() > img.min():
-                img = ImageUtils.normalize_util(img)
-            # Processing copies
-            transp_layer = img.copy()
+            # Range in a single pass, then normalize the resized copy in place
+            min_val, max_val, _, _ = cv2.minMaxLoc(img)
+            if max_val > min_val:
+                cv2.normalize(img, img, 0, 255, norm_type=cv2.NORM_MINMAX)
+            # Only final_marked is drawn upon, the other layers just read img
+            transp_layer = img
             final_marked = img.copy()
 
-            morph = img.copy()
+            morph = img
             self.append_save_img(3, morph)
 
             if auto_align:
@@ -73,7 +117,7 @@ class ImageInstanceOps:
                 _, morph = cv2.threshold(morph, 220, 220, cv2.THRESH_TRUNC)
                 morph = ImageUtils.normalize_util(morph)
                 self.append_save_img(3, morph)
-                if config.outputs.show_image_level >= 4:
+                if show_image_level >= 4:
                     InteractionUtils.show("morph1", morph, 0, 1, config)
 
             # Move them to data class if needed
@@ -86,7 +130,7 @@ class ImageInstanceOps:
             # blackVals=[0]
             # whiteVals=[255]
 
-            if config.outputs.show_image_level >= 5:
+            if show_image_level >= 5:
                 all_c_box_vals = {"int": [], "mcq": []}
                 # TODO: simplify this logic
                 q_nums = {"int": [], "mcq": []}
@@ -95,14 +139,13 @@ class ImageInstanceOps:
             if auto_align:
                 # print("Begin Alignment")
                 # Open : erode then dilate
-                v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 10))
                 morph_v = cv2.morphologyEx(
-                    morph, cv2.MORPH_OPEN, v_kernel, iterations=3
+                    morph, cv2.MORPH_OPEN, ALIGN_V_KERNEL, iterations=3
                 )
                 _, morph_v = cv2.threshold(morph_v, 200, 200, cv2.THRESH_TRUNC)
                 morph_v = 255 - ImageUtils.normalize_util(morph_v)
 
-                if config.outputs.show_image_level >= 3:
+                if show_image_level >= 3:
                     InteractionUtils.show(
                         "morphed_vertical", morph_v, 0, 1, config=config
                     )
@@ -115,7 +158,7 @@ class ImageInstanceOps:
                 morph_thr = 60  # for Mobile images, 40 for scanned Images
                 _, morph_v = cv2.threshold(morph_v, morph_thr, 255, cv2.THRESH_BINARY)
                 # kernel best tuned to 5x5 now
-                morph_v = cv2.erode(morph_v, np.ones((5, 5), np.uint8), iterations=2)
+                morph_v = cv2.erode(morph_v, ALIGN_ERODE_KERNEL, iterations=2)
 
                 self.append_save_img(3, morph_v)
                 # h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (10, 2))
@@ -125,48 +168,49 @@ class ImageInstanceOps:
                 # InteractionUtils.show("morph_h",morph_h,0,1,config=config)
                 # _, morph_h = cv2.threshold(morph_h,morph_thr,255,cv2.THRESH_BINARY)
                 # morph_h = cv2.erode(morph_h,  np.ones((5,5),np.uint8), iterations = 2)
-                if config.outputs.show_image_level >= 3:
+                if show_image_level >= 3:
                     InteractionUtils.show(
                         "morph_thr_eroded", morph_v, 0, 1, config=config
                     )
 
                 self.append_save_img(6, morph_v)
 
+                match_col, max_steps, align_stride, thk = map(
+                    config.alignment_params.get,
+                    [
+                        "match_col",
+                        "max_steps",
+                        "stride",
+                        "thickness",
+                    ],
+                )
                 # template relative alignment code
+                # The column sums at every reachable shift come from the integral
+                # image, so each block's edge columns are read in one go
+                morph_v_integral = cv2.integral(morph_v)
+                reachable_shifts = align_stride * np.arange(-max_steps, max_steps + 1)
                 for field_block in template.field_blocks:
                     s, d = field_block.origin, field_block.dimensions
-
-                    match_col, max_steps, align_stride, thk = map(
-                        config.alignment_params.get,
-                        [
-                            "match_col",
-                            "max_steps",
-                            "stride",
-                            "thickness",
-                        ],
+                    left_sums, left_areas = ImageUtils.get_boxes_sum(
+                        morph_v_integral,
+                        s[0] + reachable_shifts - thk,
+                        s[1],
+                        match_col,
+                        d[1],
+                    )
+                    right_sums, right_areas = ImageUtils.get_boxes_sum(
+                        morph_v_integral,
+                        s[0] + reachable_shifts - match_col + d[0] + thk,
+                        s[1],
+                        match_col,
+                        d[1],
                     )
-                    shift, steps = 0, 0
+                    # Same as comparing the column means with 100
+                    all_left_shifts = left_sums > 100 * left_areas
+                    all_right_shifts = right_sums > 100 * right_areas
+                    # shift is reachable_shifts[shift_index]
+                    shift, shift_index, steps = 0, max_steps, 0
                     while steps < max_steps:
-                        left_mean = np.mean(
-                            morph_v[
-                                s[1] : s[1] + d[1],
-                                s[0] + shift - thk : -thk + s[0] + shift + match_col,
-                            ]
-                        )
-                        right_mean = np.mean(
-                            morph_v[
-                                s[1] : s[1] + d[1],
-                                s[0]
-                                + shift
-                                - match_col
-                                + d[0]
-                                + thk : thk
-                                + s[0]
-                                + shift
-                                + d[0],
-                            ]
-                        )
-
                         # For demonstration purposes-
                         # if(field_block.name == "int1"):
                         #     ret = morph_v.copy()
@@ -176,16 +220,20 @@ class ImageInstanceOps:
                         #                   CLR_WHITE,
                         #                   3)
                         #     appendSaveImg(6,ret)
-                        # print(shift, left_mean, right_mean)
-                        left_shift, right_shift = left_mean > 100, right_mean > 100
+                        left_shift, right_shift = (
+                            all_left_shifts[shift_index],
+                            all_right_shifts[shift_index],
+                        )
                         if left_shift:
                             if right_shift:
                                 break
                             else:
                                 shift -= align_stride
+                                shift_index -= 1
                         else:
                             if right_shift:
                                 shift += align_stride
+                                shift_index += 1
                             else:
                                 break
                         steps += 1
@@ -196,11 +244,58 @@ class ImageInstanceOps:
                     #   "origin:", field_block.origin,'\n')
                 # print("End Alignment")
 
+            self.append_save_img(5, img)
+
+            # Get mean bubbleValues n other stats
+            # The integral image gives each bubble's mean in four lookups,
+            # so all bubbles of the sheet are read in one go (shifted)
+            integral_img = cv2.integral(img)
+            all_bubble_xs = template.all_bubble_xs
+            block_shifts = [field_block.shift for field_block in template.field_blocks]
+            # Unaligned or unmoved blocks read the template positions as they are
+            if any(block_shifts):
+                all_bubble_xs = all_bubble_xs + np.repeat(
+                    block_shifts, template.block_bubbles_counts
+                )
+            all_q_vals = ImageUtils.get_boxes_mean(
+                integral_img,
+                all_bubble_xs,
+                template.all_bubble_ys,
+                template.all_bubble_ws,
+                template.all_bubble_hs,
+            )
+            all_block_q_vals = []
+            all_q_strip_arrs, all_sorted_q_strip_arrs, all_q_std_vals = [], [], []
+            q_block_start = 0
+            for field_block in template.field_blocks:
+                # Each strip is a view into the sheet's values
+                q_block_end = q_block_start + field_block.bubble_xs.size
+                block_q_vals = all_q_vals[q_block_start:q_block_end].reshape(
+                    field_block.bubble_xs.shape
+                )
+                q_block_start = q_block_end
+                all_block_q_vals.append(block_q_vals)
+                # Std-dev of every strip of the block in a single call
+                all_q_std_vals.extend(
+                    round(q_std_val, 2) for q_std_val in np.std(block_q_vals, axis=1)
+                )
+                all_q_strip_arrs.extend(block_q_vals)
+                # Sort every strip of the block for its local threshold at once
+                all_sorted_q_strip_arrs.extend(np.sort(block_q_vals, axis=1))
+                # _, _, _ = get_global_threshold(q_strip_vals, "QStrip Plot",
+                #   plot_show=False, sort_in_plot=True)
+                # hist = getPlotImg()
+                # InteractionUtils.show("QStrip "+field_block_bubbles[0].field_label, hist, 0, 1,config=config)
+
             final_align = None
-            if config.outputs.show_image_level >= 2:
+            # The layouts are only shown from level 3, at level 2 they're only saved
+            if show_image_level >= 3 or (
+                show_image_level >= 2 and self.save_image_level >= 2
+            ):
                 initial_align = self.draw_template_layout(img, template, shifted=False)
+                # The shifted layout shows the bubble means read above
                 final_align = self.draw_template_layout(
-                    img, template, shifted=True, draw_qvals=True
+                    img, template, shifted=True, block_q_vals=all_block_q_vals
                 )
                 # appendSaveImg(4,mean_vals)
                 self.append_save_img(2, initial_align)
@@ -208,34 +303,6 @@ class ImageInstanceOps:
 
                 if auto_align:
                     final_align = np.hstack((initial_align, final_align))
-            self.append_save_img(5, img)
-
-            # Get mean bubbleValues n other stats
-            all_q_vals, all_q_strip_arrs, all_q_std_vals = [], [], []
-            total_q_strip_no = 0
-            for field_block in template.field_blocks:
-                box_w, box_h = field_block.bubble_dimensions
-                q_std_vals = []
-                for field_block_bubbles in field_block.traverse_bubbles:
-                    q_strip_vals = []
-                    for pt in field_block_bubbles:
-                        # shifted
-                        x, y = (pt.x + field_block.shift, pt.y)
-                        rect = [y, y + box_h, x, x + box_w]
-                        q_strip_vals.append(
-                            cv2.mean(img[rect[0] : rect[1], rect[2] : rect[3]])[0]
-                            # detectCross(img, rect) ? 100 : 0
-                        )
-                    q_std_vals.append(round(np.std(q_strip_vals), 2))
-                    all_q_strip_arrs.append(q_strip_vals)
-                    # _, _, _ = get_global_threshold(q_strip_vals, "QStrip Plot",
-                    #   plot_show=False, sort_in_plot=True)
-                    # hist = getPlotImg()
-                    # InteractionUtils.show("QStrip "+field_block_bubbles[0].field_label, hist, 0, 1,config=config)
-                    all_q_vals.extend(q_strip_vals)
-                    # print(total_q_strip_no, field_block_bubbles[0].field_label, q_std_vals[len(q_std_vals)-1])
-                    total_q_strip_no += 1
-                all_q_std_vals.extend(q_std_vals)
 
             global_std_thresh, _, _ = self.get_global_threshold(
                 all_q_std_vals
@@ -263,28 +330,52 @@ class ImageInstanceOps:
             #     appendSaveImg(5,hist)
             #     appendSaveImg(2,hist)
 
-            per_omr_threshold_avg, total_q_strip_no, total_q_box_no = 0, 0, 0
+            # All Black or All White case, decided for every strip at once
+            all_no_outliers = np.asarray(all_q_std_vals) < global_std_thresh
+
+            show_strip_plots = show_image_level >= 6
+            marked_text_thickness = int(1 + 3.5 * TEXT_SIZE)
+            per_omr_threshold_avg, total_q_strip_no = 0, 0
             for field_block in template.field_blocks:
                 block_q_strip_no = 1
                 box_w, box_h = field_block.bubble_dimensions
                 shift = field_block.shift
                 s, d = field_block.origin, field_block.dimensions
                 key = field_block.name[:3]
+                block_marked_boxes, block_unmarked_boxes = self.get_block_inset_boxes(
+                    field_block, shift
+                )
+                # Text positions come from the block's arrays, not the Bubbles
+                block_xs = (field_block.bubble_xs + shift).tolist()
+                block_ys = field_block.bubble_ys.tolist()
+                bubble_values = field_block.bubble_values
+                empty_val = field_block.empty_val
                 # cv2.rectangle(final_marked,(s[0]+shift,s[1]),(s[0]+shift+d[0],
                 #   s[1]+d[1]),CLR_BLACK,3)
-                for field_block_bubbles in field_block.traverse_bubbles:
-                    # All Black or All White case
-                    no_outliers = all_q_std_vals[total_q_strip_no] < global_std_thresh
-                    # print(total_q_strip_no, field_block_bubbles[0].field_label,
+                for field_label, xs, ys, marked_boxes, unmarked_boxes in zip(
+                    field_block.parsed_field_labels,
+                    block_xs,
+                    block_ys,
+                    block_marked_boxes,
+                    block_unmarked_boxes,
+                ):
+                    no_outliers = all_no_outliers[total_q_strip_no]
+                    # print(total_q_strip_no, field_label,
                     #   all_q_std_vals[total_q_strip_no], "no_outliers:", no_outliers)
+                    # Only build the plot title when the histogram will be shown
+                    plot_title = (
+                        f"Mean Intensity Histogram for {key}.{field_label}.{block_q_strip_no}"
+                        if show_strip_plots
+                        else None
+                    )
                     per_q_strip_threshold = self.get_local_threshold(
-                        all_q_strip_arrs[total_q_strip_no],
+                        all_sorted_q_strip_arrs[total_q_strip_no],
                         global_thr,
                         no_outliers,
-                        f"Mean Intensity Histogram for {key}.{field_block_bubbles[0].field_label}.{block_q_strip_no}",
-                        config.outputs.show_image_level >= 6,
+                        plot_title,
+                        show_strip_plots,
                     )
-                    # print(field_block_bubbles[0].field_label,key,block_q_strip_no, "THR: ",
+                    # print(field_label,key,block_q_strip_no, "THR: ",
                     #   round(per_q_strip_threshold,2))
                     per_omr_threshold_avg += per_q_strip_threshold
 
@@ -298,27 +389,33 @@ class ImageInstanceOps:
                     #     InteractionUtils.show("QStrip: "+key+"-"+str(block_q_strip_no),
                     #     img[st[1] : end[1], st[0]+shift : end[0]+shift],0,config=config)
 
-                    # TODO: get rid of total_q_box_no
-                    detected_bubbles = []
-                    for bubble in field_block_bubbles:
-                        bubble_is_marked = (
-                            per_q_strip_threshold > all_q_vals[total_q_box_no]
-                        )
-                        total_q_box_no += 1
+                    # Compare the whole strip against its threshold in one go
+                    marked_mask = (
+                        all_q_strip_arrs[total_q_strip_no] < per_q_strip_threshold
+                    )
+                    # Only the marked values are needed for the response
+                    detected_values = []
+                    for (
+                        field_value,
+                        bubble_is_marked,
+                        x,
+                        y,
+                        marked_box,
+                        unmarked_box,
+                    ) in zip(
+                        bubble_values,
+                        marked_mask,
+                        xs,
+                        ys,
+                        marked_boxes,
+                        unmarked_boxes,
+                    ):
                         if bubble_is_marked:
-                            detected_bubbles.append(bubble)
-                            x, y, field_value = (
-                                bubble.x + field_block.shift,
-                                bubble.y,
-                                bubble.field_value,
-                            )
+                            detected_values.append(field_value)
                             cv2.rectangle(
                                 final_marked,
-                                (int(x + box_w / 12), int(y + box_h / 12)),
-                                (
-                                    int(x + box_w - box_w / 12),
-                                    int(y + box_h - box_h / 12),
-                                ),
+                                marked_box[:2],
+                                marked_box[2:],
                                 CLR_DARK_GRAY,
                                 3,
                             )
@@ -330,41 +427,30 @@ class ImageInstanceOps:
                                 cv2.FONT_HERSHEY_SIMPLEX,
                                 TEXT_SIZE,
                                 (20, 20, 10),
-                                int(1 + 3.5 * TEXT_SIZE),
+                                marked_text_thickness,
                             )
                         else:
                             cv2.rectangle(
                                 final_marked,
-                                (int(x + box_w / 10), int(y + box_h / 10)),
-                                (
-                                    int(x + box_w - box_w / 10),
-                                    int(y + box_h - box_h / 10),
-                                ),
+                                unmarked_box[:2],
+                                unmarked_box[2:],
                                 CLR_GRAY,
                                 -1,
                             )
 
-                    for bubble in detected_bubbles:
-                        field_label, field_value = (
-                            bubble.field_label,
-                            bubble.field_value,
-                        )
+                    # Note: field labels are unique across strips (validated in template)
+                    marked_count = len(detected_values)
+                    if marked_count == 0:
+                        omr_response[field_label] = empty_val
+                    else:
+                        omr_response[field_label] = "".join(detected_values)
                         # Only send rolls multi-marked in the directory
-                        multi_marked_local = field_label in omr_response
-                        omr_response[field_label] = (
-                            (omr_response[field_label] + field_value)
-                            if multi_marked_local
-                            else field_value
-                        )
+                        multi_marked_local = marked_count > 1
                         # TODO: generalize this into identifier
                         # multi_roll = multi_marked_local and "Roll" in str(q)
                         multi_marked = multi_marked or multi_marked_local
 
-                    if len(detected_bubbles) == 0:
-                        field_label = field_block_bubbles[0].field_label
-                        omr_response[field_label] = field_block.empty_val
-
-                    if config.outputs.show_image_level >= 5:
+                    if show_image_level >= 5:
                         if key in all_c_box_vals:
                             q_nums[key].append(f"{key[:2]}_c{str(block_q_strip_no)}")
                             all_c_box_vals[key].append(
@@ -382,19 +468,14 @@ class ImageInstanceOps:
                 final_marked, alpha, transp_layer, 1 - alpha, 0, final_marked
             )
             # Box types
-            if config.outputs.show_image_level >= 6:
+            if show_image_level >= 6:
+                plt = ImageUtils.get_pyplot()
                 # plt.draw()
                 f, axes = plt.subplots(len(all_c_box_vals), sharey=True)
                 f.canvas.manager.set_window_title(name)
                 ctr = 0
-                type_name = {
-                    "int": "Integer",
-                    "mcq": "MCQ",
-                    "med": "MED",
-                    "rol": "Roll",
-                }
                 for k, boxvals in all_c_box_vals.items():
-                    axes[ctr].title.set_text(type_name[k] + " Type")
+                    axes[ctr].title.set_text(BOX_TYPE_NAMES[k] + " Type")
                     axes[ctr].boxplot(boxvals)
                     # thrline=axes[ctr].axhline(per_omr_threshold_avg,color='red',ls='--')
                     # thrline.set_label("Average THR")
@@ -406,7 +487,7 @@ class ImageInstanceOps:
                 plt.tight_layout(pad=0.5)
                 plt.show()
 
-            if config.outputs.show_image_level >= 3 and final_align is not None:
+            if show_image_level >= 3 and final_align is not None:
                 final_align = ImageUtils.resize_util_h(
                     final_align, int(config.dimensions.display_height)
                 )
@@ -419,13 +500,17 @@ class ImageInstanceOps:
                 if multi_roll:
                     save_dir = save_dir.joinpath("_MULTI_")
                 image_path = str(save_dir.joinpath(name))
-                ImageUtils.save_img(image_path, final_marked)
+                ImageUtils.save_img(image_path, final_marked, image_writer)
 
             self.append_save_img(2, final_marked)
 
             if save_dir is not None:
+                stack_name = os.path.splitext(name)[0]
                 for i in range(config.outputs.save_image_level):
-                    self.save_image_stacks(i + 1, name, save_dir)
+                    self.save_image_stacks(i + 1, stack_name, save_dir, image_writer)
+            # Nothing reads the stacked copies after this point, release them
+            # instead of keeping them alive until the next sheet
+            self.reset_all_save_img()
 
             return omr_response, final_marked, multi_marked, multi_roll
 
@@ -433,15 +518,62 @@ class ImageInstanceOps:
             raise e
 
     @staticmethod
-    def draw_template_layout(img, template, shifted=True, draw_qvals=False, border=-1):
-        img = ImageUtils.resize_util(
+    def get_inset_boxes(xs, ys, box_w, box_h, pad_w, pad_h):
+        """
+        Returns [x1, y1, x2, y2] int corners of the boxes at (xs, ys) shrunk by
+        (pad_w, pad_h) on each side, as nested lists shaped like xs.
+        """
+        boxes = np.stack(
+            [xs + pad_w, ys + pad_h, xs + box_w - pad_w, ys + box_h - pad_h],
+            axis=-1,
+        )
+        return boxes.astype(int).tolist()
+
+    @staticmethod
+    def get_block_inset_boxes(field_block, shift):
+        """
+        Returns the corners of the marked and unmarked boxes of every bubble in
+        the field block. These only depend on the shift, so they are reused
+        across sheets.
+        """
+        block_boxes = field_block.inset_boxes_by_shift.get(shift)
+        if block_boxes is None:
+            box_w, box_h = field_block.bubble_dimensions
+            block_xs, block_ys = field_block.bubble_xs + shift, field_block.bubble_ys
+            block_boxes = (
+                ImageInstanceOps.get_inset_boxes(
+                    block_xs, block_ys, box_w, box_h, box_w / 12, box_h / 12
+                ),
+                ImageInstanceOps.get_inset_boxes(
+                    block_xs, block_ys, box_w, box_h, box_w / 10, box_h / 10
+                ),
+            )
+            field_block.inset_boxes_by_shift[shift] = block_boxes
+        return block_boxes
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_block_name_size(block_name):
+        # The block names are fixed by the template, so each is measured only once
+        return cv2.getTextSize(block_name, cv2.FONT_HERSHEY_SIMPLEX, TEXT_SIZE, 4)[0]
+
+    @staticmethod
+    def draw_template_layout(img, template, shifted=True, block_q_vals=None, border=-1):
+        """
+        Draws the field blocks and bubbles of the template on a resized copy of img.
+        block_q_vals holds the bubble means of each field block (as fields x values
+        arrays), which are written on the bubbles when given.
+        """
+        # resize_util returns a new image, which is drawn upon directly
+        final_align = ImageUtils.resize_util(
             img, template.page_dimensions[0], template.page_dimensions[1]
         )
-        final_align = img.copy()
-        for field_block in template.field_blocks:
+        draw_qvals = block_q_vals is not None
+        for block_index, field_block in enumerate(template.field_blocks):
             s, d = field_block.origin, field_block.dimensions
             box_w, box_h = field_block.bubble_dimensions
             shift = field_block.shift
+            drawn_shift = shift if shifted else 0
             if shifted:
                 cv2.rectangle(
                     final_align,
@@ -458,35 +590,46 @@ class ImageInstanceOps:
                     CLR_BLACK,
                     3,
                 )
-            for field_block_bubbles in field_block.traverse_bubbles:
-                for pt in field_block_bubbles:
-                    x, y = (pt.x + field_block.shift, pt.y) if shifted else (pt.x, pt.y)
-                    cv2.rectangle(
-                        final_align,
-                        (int(x + box_w / 10), int(y + box_h / 10)),
-                        (int(x + box_w - box_w / 10), int(y + box_h - box_h / 10)),
-                        CLR_GRAY,
-                        border,
-                    )
-                    if draw_qvals:
-                        rect = [y, y + box_h, x, x + box_w]
-                        cv2.putText(
-                            final_align,
-                            f"{int(cv2.mean(img[rect[0] : rect[1], rect[2] : rect[3]])[0])}",
-                            (rect[2] + 2, rect[0] + (box_h * 2) // 3),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.6,
-                            CLR_BLACK,
-                            2,
-                        )
-            if shifted:
-                text_in_px = cv2.getTextSize(
-                    field_block.name, cv2.FONT_HERSHEY_SIMPLEX, TEXT_SIZE, 4
+            _, block_boxes = ImageInstanceOps.get_block_inset_boxes(
+                field_block, drawn_shift
+            )
+            if not draw_qvals and border > 0:
+                # Outlines of the same colour don't depend on their drawing order,
+                # so all boxes of the block are outlined in a single call
+                x1, y1, x2, y2 = np.reshape(block_boxes, (-1, 4)).T
+                box_contours = np.stack([x1, y1, x2, y1, x2, y2, x1, y2], axis=1)
+                cv2.polylines(
+                    final_align,
+                    list(box_contours.reshape(-1, 4, 2).astype(np.int32)),
+                    True,
+                    CLR_GRAY,
+                    border,
                 )
+            else:
+                if draw_qvals:
+                    q_vals = block_q_vals[block_index].astype(int).tolist()
+                for i, (field_block_bubbles, boxes) in enumerate(
+                    zip(field_block.traverse_bubbles, block_boxes)
+                ):
+                    for j, (pt, box) in enumerate(zip(field_block_bubbles, boxes)):
+                        cv2.rectangle(final_align, box[:2], box[2:], CLR_GRAY, border)
+                        if draw_qvals:
+                            x, y = pt.x + drawn_shift, pt.y
+                            cv2.putText(
+                                final_align,
+                                f"{q_vals[i][j]}",
+                                (x + 2, y + (box_h * 2) // 3),
+                                cv2.FONT_HERSHEY_SIMPLEX,
+                                0.6,
+                                CLR_BLACK,
+                                2,
+                            )
+            if shifted:
+                text_w, text_h = ImageInstanceOps.get_block_name_size(field_block.name)
                 cv2.putText(
                     final_align,
                     field_block.name,
-                    (int(s[0] + d[0] - text_in_px[0][0]), int(s[1] - text_in_px[0][1])),
+                    (int(s[0] + d[0] - text_w), int(s[1] - text_h)),
                     cv2.FONT_HERSHEY_SIMPLEX,
                     TEXT_SIZE,
                     CLR_BLACK,
@@ -527,46 +670,17 @@ class ImageInstanceOps:
             gives the smaller one
 
         """
-        config = self.tuning_config
-        PAGE_TYPE_FOR_THRESHOLD, MIN_JUMP, JUMP_DELTA = map(
-            config.threshold_params.get,
-            [
-                "PAGE_TYPE_FOR_THRESHOLD",
-                "MIN_JUMP",
-                "JUMP_DELTA",
-            ],
-        )
-
-        global_default_threshold = (
-            GLOBAL_PAGE_THRESHOLD_WHITE
-            if PAGE_TYPE_FOR_THRESHOLD == "white"
-            else GLOBAL_PAGE_THRESHOLD_BLACK
-        )
+        MIN_JUMP, JUMP_DELTA = self.min_jump, self.jump_delta
+        global_default_threshold = self.global_default_threshold
 
         # Sort the Q bubbleValues
         # TODO: Change var name of q_vals
-        q_vals = sorted(q_vals_orig)
+        q_vals = np.sort(q_vals_orig)
         # Find the FIRST LARGE GAP and set it as threshold:
         ls = (looseness + 1) // 2
-        l = len(q_vals) - ls
-        max1, thr1 = MIN_JUMP, global_default_threshold
-        for i in range(ls, l):
-            jump = q_vals[i + ls] - q_vals[i - ls]
-            if jump > max1:
-                max1 = jump
-                thr1 = q_vals[i - ls] + jump / 2
-
-        # NOTE: thr2 is deprecated, thus is JUMP_DELTA
-        # Make use of the fact that the JUMP_DELTA(Vertical gap ofc) between
-        # values at detected jumps would be atleast 20
-        max2, thr2 = MIN_JUMP, global_default_threshold
-        # Requires atleast 1 gray box to be present (Roll field will ensure this)
-        for i in range(ls, l):
-            jump = q_vals[i + ls] - q_vals[i - ls]
-            new_thr = q_vals[i - ls] + jump / 2
-            if jump > max2 and abs(thr1 - new_thr) > JUMP_DELTA:
-                max2 = jump
-                thr2 = new_thr
+        max1, thr1 = self.get_largest_jump(
+            q_vals, ls, MIN_JUMP, global_default_threshold
+        )
         # global_thr = min(thr1,thr2)
         global_thr, j_low, j_high = thr1, thr1 - max1 // 2, thr1 + max1 // 2
 
@@ -577,6 +691,20 @@ class ImageInstanceOps:
         #     global_thr, j_low, j_high = thr2, thr2 - max2//2, thr2 + max2//2
 
         if plot_title:
+            # NOTE: thr2 is deprecated, thus is JUMP_DELTA. It is only plotted now.
+            # Make use of the fact that the JUMP_DELTA(Vertical gap ofc) between
+            # values at detected jumps would be atleast 20
+            l = len(q_vals) - ls
+            max2, thr2 = MIN_JUMP, global_default_threshold
+            # Requires atleast 1 gray box to be present (Roll field will ensure this)
+            for i in range(ls, l):
+                jump = q_vals[i + ls] - q_vals[i - ls]
+                new_thr = q_vals[i - ls] + jump / 2
+                if jump > max2 and abs(thr1 - new_thr) > JUMP_DELTA:
+                    max2 = jump
+                    thr2 = new_thr
+
+            plt = ImageUtils.get_pyplot()
             _, ax = plt.subplots()
             ax.bar(range(len(q_vals_orig)), q_vals if sort_in_plot else q_vals_orig)
             ax.set_title(plot_title)
@@ -598,7 +726,7 @@ class ImageInstanceOps:
         return global_thr, j_low, j_high
 
     def get_local_threshold(
-        self, q_vals, global_thr, no_outliers, plot_title=None, plot_show=True
+        self, sorted_q_vals, global_thr, no_outliers, plot_title=None, plot_show=True
     ):
         """
         TODO: Update this documentation too-
@@ -623,18 +751,16 @@ class ImageInstanceOps:
             ....||||||
             ||||||||||
 
+        Expects the strip's bubble values already sorted in ascending order.
         """
-        config = self.tuning_config
-        # Sort the Q bubbleValues
-        q_vals = sorted(q_vals)
+        q_vals = sorted_q_vals
 
         # Small no of pts cases:
         # base case: 1 or 2 pts
         if len(q_vals) < 3:
+            # q_vals is sorted, so its range is read from the ends
             thr1 = (
-                global_thr
-                if np.max(q_vals) - np.min(q_vals) < config.threshold_params.MIN_GAP
-                else np.mean(q_vals)
+                global_thr if q_vals[-1] - q_vals[0] < self.min_gap else np.mean(q_vals)
             )
         else:
             # qmin, qmax, qmean, qstd = round(np.min(q_vals),2), round(np.max(q_vals),2),
@@ -654,34 +780,34 @@ class ImageInstanceOps:
             #   '\t',round(DISCRETION*gstd,2), L2MaxGap)
 
             # else:
-            # Find the LARGEST GAP and set it as threshold: //(FIRST LARGE GAP)
-            l = len(q_vals) - 1
-            max1, thr1 = config.threshold_params.MIN_JUMP, 255
-            for i in range(1, l):
-                jump = q_vals[i + 1] - q_vals[i - 1]
-                if jump > max1:
-                    max1 = jump
-                    thr1 = q_vals[i - 1] + jump / 2
-            # print(field_label,q_vals,max1)
-
-            confident_jump = (
-                config.threshold_params.MIN_JUMP
-                + config.threshold_params.CONFIDENT_SURPLUS
-            )
-            # If not confident, then only take help of global_thr
-            if max1 < confident_jump:
-                if no_outliers:
-                    # All Black or All White case
-                    thr1 = global_thr
-                else:
-                    # TODO: Low confidence parameters here
-                    pass
+            # No jump can exceed the strip's range, so a narrow strip with no
+            # outliers can never be confident: skip the jump search for it
+            if (
+                no_outliers
+                and max(self.min_jump, q_vals[-1] - q_vals[0]) < self.confident_jump
+            ):
+                # All Black or All White case
+                thr1 = global_thr
+            else:
+                # Find the LARGEST GAP and set it as threshold: //(FIRST LARGE GAP)
+                max1, thr1 = self.get_largest_jump(q_vals, 1, self.min_jump, 255)
+                # print(field_label,q_vals,max1)
+
+                # If not confident, then only take help of global_thr
+                if max1 < self.confident_jump:
+                    if no_outliers:
+                        # All Black or All White case
+                        thr1 = global_thr
+                    else:
+                        # TODO: Low confidence parameters here
+                        pass
 
             # if(thr1 == 255):
             #     print("Warning: threshold is unexpectedly 255! (Outlier Delta issue?)",plot_title)
 
         # Make a common plot function to show local and global thresholds
         if plot_show and plot_title is not None:
+            plt = ImageUtils.get_pyplot()
             _, ax = plt.subplots()
             ax.bar(range(len(q_vals)), q_vals)
             thrline = ax.axhline(thr1, color="green", ls=("-."), linewidth=3)
@@ -698,30 +824,57 @@ class ImageInstanceOps:
                 plt.show()
         return thr1
 
+    @staticmethod
+    def get_largest_jump(sorted_q_vals, span, min_jump, default_thr):
+        """
+        Finds the largest jump between values `span` positions apart on either side
+        (the first one in case of ties), returning it with the threshold at its middle.
+        Falls back to (min_jump, default_thr) when no jump exceeds min_jump.
+        """
+        jumps_count = len(sorted_q_vals) - 2 * span
+        if jumps_count <= 0:
+            return min_jump, default_thr
+        jumps = sorted_q_vals[2 * span :] - sorted_q_vals[:jumps_count]
+        i = int(np.argmax(jumps))
+        if jumps[i] <= min_jump:
+            return min_jump, default_thr
+        return float(jumps[i]), float(sorted_q_vals[i] + jumps[i] / 2)
+
     def append_save_img(self, key, img):
         if self.save_image_level >= int(key):
             self.save_img_list[key].append(img.copy())
 
-    def save_image_stacks(self, key, filename, save_dir):
+    def save_image_stacks(self, key, name, save_dir, image_writer=None):
         config = self.tuning_config
         if self.save_image_level >= int(key) and self.save_img_list[key] != []:
-            name = os.path.splitext(filename)[0]
-            result = np.hstack(
-                tuple(
-                    [
-                        ImageUtils.resize_util_h(img, config.dimensions.display_height)
-                        for img in self.save_img_list[key]
-                    ]
-                )
+            save_imgs = self.save_img_list[key]
+            display_height = int(config.dimensions.display_height)
+            widths = [
+                int(img.shape[1] * display_height / img.shape[0]) for img in save_imgs
+            ]
+            # Each image is resized straight into its slot of the stack, so the
+            # resized copies are never held alongside the stacked result
+            result = np.empty(
+                (display_height, sum(widths)) + save_imgs[0].shape[2:],
+                dtype=save_imgs[0].dtype,
             )
+            x = 0
+            for img, width in zip(save_imgs, widths):
+                cv2.resize(img, (width, display_height), dst=result[:, x : x + width])
+                x += width
             result = ImageUtils.resize_util(
                 result,
                 min(
-                    len(self.save_img_list[key]) * config.dimensions.display_width // 3,
+                    len(save_imgs) * config.dimensions.display_width // 3,
                     int(config.dimensions.display_width * 2.5),
                 ),
             )
-            ImageUtils.save_img(f"{save_dir}stack/{name}_{str(key)}_stack.jpg", result)
+            ImageUtils.save_img(
+                str(save_dir.joinpath("stack", f"{name}_{str(key)}_stack.jpg")),
+                result,
+                image_writer,
+                (cv2.IMWRITE_JPEG_QUALITY, DEBUG_STACK_JPEG_QUALITY),
+            )
 
     def reset_all_save_img(self):
         for i in range(self.save_image_level):
@@ -7,12 +7,11 @@
 
 """
 import os
-from csv import QUOTE_NONNUMERIC
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from time import time
 
 import cv2
-import pandas as pd
 from rich.table import Table
 
 from src.constants.common import (
@@ -25,8 +24,13 @@ from src.defaults import CONFIG_DEFAULTS
 from src.evaluation import EvaluationConfig, evaluate_concatenated_response
 from src.logger import console, logger
 from src.template import Template
-from src.utils.file import Paths, setup_dirs_for_paths, setup_outputs_for_template
-from src.utils.image import ImageUtils
+from src.utils.file import (
+    Paths,
+    flush_pending_rows,
+    setup_dirs_for_paths,
+    setup_outputs_for_template,
+)
+from src.utils.image import ImageUtils, ImageWriter
 from src.utils.interaction import InteractionUtils, Stats
 from src.utils.parsing import get_concatenated_response, open_config_with_defaults
 
@@ -130,7 +134,10 @@ def process_dir(
             Path(exclude_file) for exclude_file in evaluation_config.get_exclude_files()
         )
 
-    omr_files = [f for f in omr_files if f not in excluded_files]
+    # Most directories have nothing to exclude
+    if excluded_files:
+        excluded_files = set(excluded_files)
+        omr_files = [f for f in omr_files if f not in excluded_files]
 
     if omr_files:
         if not template:
@@ -212,131 +219,145 @@ def process_files(
     files_counter = 0
     STATS.files_not_moved = 0
 
-    for file_path in omr_files:
-        files_counter += 1
-        file_name = file_path.name
+    # These depend only on the directory's config, so decide them once
+    should_log_response = (
+        evaluation_config is None or not evaluation_config.get_should_explain_scoring()
+    )
+    show_final_marked = tuning_config.outputs.show_image_level >= 2
+    filter_out_multimarked_files = tuning_config.outputs.filter_out_multimarked_files
+    # The output directories don't change between files
+    paths = outputs_namespace.paths
+    save_dir = paths.save_marked_dir
+
+    # Marked images are written on a worker thread while the next sheet is read,
+    # closing the writer waits for the pending writes and logs any that failed
+    image_writer = ImageWriter()
+    try:
+        for file_path, in_omr in read_images_ahead(omr_files):
+            files_counter += 1
+            file_name = file_path.name
+
+            logger.info("")
+            logger.info(
+                f"({files_counter}) Opening image: \t'{file_path}'\tResolution: {in_omr.shape}"
+            )
 
-        in_omr = cv2.imread(str(file_path), cv2.IMREAD_GRAYSCALE)
+            template.image_instance_ops.reset_all_save_img()
 
-        logger.info("")
-        logger.info(
-            f"({files_counter}) Opening image: \t'{file_path}'\tResolution: {in_omr.shape}"
-        )
+            template.image_instance_ops.append_save_img(1, in_omr)
 
-        template.image_instance_ops.reset_all_save_img()
+            in_omr = template.image_instance_ops.apply_preprocessors(
+                file_path, in_omr, template
+            )
 
-        template.image_instance_ops.append_save_img(1, in_omr)
+            if in_omr is None:
+                # Error OMR case
+                new_file_path = paths.errors_dir.joinpath(file_name)
+                if check_and_move(ERROR_CODES.NO_MARKER_ERR, file_path, new_file_path):
+                    err_line = [
+                        file_name,
+                        file_path,
+                        new_file_path,
+                        "NA",
+                    ] + outputs_namespace.empty_resp
+                    outputs_namespace.pending_rows["Errors"].append(err_line)
+                continue
+
+            # uniquify (Path.name is already a str)
+            file_id = file_name
+            (
+                response_dict,
+                final_marked,
+                multi_marked,
+                _,
+            ) = template.image_instance_ops.read_omr_response(
+                template,
+                image=in_omr,
+                name=file_id,
+                save_dir=save_dir,
+                image_writer=image_writer,
+            )
 
-        in_omr = template.image_instance_ops.apply_preprocessors(
-            file_path, in_omr, template
-        )
+            # TODO: move inner try catch here
+            # concatenate roll nos, set unmarked responses, etc
+            omr_response = get_concatenated_response(response_dict, template)
 
-        if in_omr is None:
-            # Error OMR case
-            new_file_path = outputs_namespace.paths.errors_dir.joinpath(file_name)
-            outputs_namespace.OUTPUT_SET.append(
-                [file_name] + outputs_namespace.empty_resp
-            )
-            if check_and_move(ERROR_CODES.NO_MARKER_ERR, file_path, new_file_path):
-                err_line = [
-                    file_name,
+            if should_log_response:
+                # The response is only stringified when INFO is enabled
+                logger.info("Read Response: \n", omr_response, sep="")
+
+            score = 0
+            if evaluation_config is not None:
+                score = evaluate_concatenated_response(
+                    omr_response,
+                    evaluation_config,
                     file_path,
-                    new_file_path,
-                    "NA",
-                ] + outputs_namespace.empty_resp
-                pd.DataFrame(err_line, dtype=str).T.to_csv(
-                    outputs_namespace.files_obj["Errors"],
-                    mode="a",
-                    quoting=QUOTE_NONNUMERIC,
-                    header=False,
-                    index=False,
+                    paths.evaluation_dir,
+                )
+                logger.info(
+                    f"(/{files_counter}) Graded with score: {round(score, 2)}\t for file: '{file_id}'"
+                )
+            else:
+                logger.info(f"(/{files_counter}) Processed file: '{file_id}'")
+
+            if show_final_marked:
+                InteractionUtils.show(
+                    f"Final Marked Bubbles : '{file_id}'",
+                    ImageUtils.resize_util_h(
+                        final_marked, int(tuning_config.dimensions.display_height * 1.3)
+                    ),
+                    1,
+                    1,
+                    config=tuning_config,
                 )
-            continue
-
-        # uniquify
-        file_id = str(file_name)
-        save_dir = outputs_namespace.paths.save_marked_dir
-        (
-            response_dict,
-            final_marked,
-            multi_marked,
-            _,
-        ) = template.image_instance_ops.read_omr_response(
-            template, image=in_omr, name=file_id, save_dir=save_dir
-        )
 
-        # TODO: move inner try catch here
-        # concatenate roll nos, set unmarked responses, etc
-        omr_response = get_concatenated_response(response_dict, template)
+            # Each row is only kept in the buffer of the csv it's written to
+            resp_array = [omr_response[k] for k in template.output_columns]
+
+            if multi_marked == 0 or not filter_out_multimarked_files:
+                STATS.files_not_moved += 1
+                new_file_path = save_dir.joinpath(file_id)
+                # Enter into Results sheet-
+                results_line = [file_name, file_path, new_file_path, score] + resp_array
+                # Buffer for results_line file(opened in append mode)
+                outputs_namespace.pending_rows["Results"].append(results_line)
+            else:
+                # multi_marked file
+                logger.info(f"[{files_counter}] Found multi-marked file: '{file_id}'")
+                new_file_path = paths.multi_marked_dir.joinpath(file_name)
+                if check_and_move(
+                    ERROR_CODES.MULTI_BUBBLE_WARN, file_path, new_file_path
+                ):
+                    mm_line = [file_name, file_path, new_file_path, "NA"] + resp_array
+                    outputs_namespace.pending_rows["MultiMarked"].append(mm_line)
+                # else:
+                #     TODO:  Add appropriate record handling here
+                #     pass
+    finally:
+        image_writer.close()
+        # write the buffered csv rows in one go per output file
+        flush_pending_rows(outputs_namespace)
 
-        if (
-            evaluation_config is None
-            or not evaluation_config.get_should_explain_scoring()
-        ):
-            logger.info(f"Read Response: \n{omr_response}")
+    print_stats(start_time, files_counter, tuning_config)
 
-        score = 0
-        if evaluation_config is not None:
-            score = evaluate_concatenated_response(
-                omr_response,
-                evaluation_config,
-                file_path,
-                outputs_namespace.paths.evaluation_dir,
-            )
-            logger.info(
-                f"(/{files_counter}) Graded with score: {round(score, 2)}\t for file: '{file_id}'"
-            )
-        else:
-            logger.info(f"(/{files_counter}) Processed file: '{file_id}'")
-
-        if tuning_config.outputs.show_image_level >= 2:
-            InteractionUtils.show(
-                f"Final Marked Bubbles : '{file_id}'",
-                ImageUtils.resize_util_h(
-                    final_marked, int(tuning_config.dimensions.display_height * 1.3)
-                ),
-                1,
-                1,
-                config=tuning_config,
-            )
 
-        resp_array = []
-        for k in template.output_columns:
-            resp_array.append(omr_response[k])
-
-        outputs_namespace.OUTPUT_SET.append([file_name] + resp_array)
-
-        if multi_marked == 0 or not tuning_config.outputs.filter_out_multimarked_files:
-            STATS.files_not_moved += 1
-            new_file_path = save_dir.joinpath(file_id)
-            # Enter into Results sheet-
-            results_line = [file_name, file_path, new_file_path, score] + resp_array
-            # Write/Append to results_line file(opened in append mode)
-            pd.DataFrame(results_line, dtype=str).T.to_csv(
-                outputs_namespace.files_obj["Results"],
-                mode="a",
-                quoting=QUOTE_NONNUMERIC,
-                header=False,
-                index=False,
+def read_images_ahead(omr_files):
+    """
+    Yields (file_path, grayscale image) pairs while decoding the next file on a
+    worker thread, so that disk reads overlap with processing the current sheet.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = None
+        for file_path in omr_files:
+            next_read = (
+                file_path,
+                executor.submit(cv2.imread, str(file_path), cv2.IMREAD_GRAYSCALE),
             )
-        else:
-            # multi_marked file
-            logger.info(f"[{files_counter}] Found multi-marked file: '{file_id}'")
-            new_file_path = outputs_namespace.paths.multi_marked_dir.joinpath(file_name)
-            if check_and_move(ERROR_CODES.MULTI_BUBBLE_WARN, file_path, new_file_path):
-                mm_line = [file_name, file_path, new_file_path, "NA"] + resp_array
-                pd.DataFrame(mm_line, dtype=str).T.to_csv(
-                    outputs_namespace.files_obj["MultiMarked"],
-                    mode="a",
-                    quoting=QUOTE_NONNUMERIC,
-                    header=False,
-                    index=False,
-                )
-            # else:
-            #     TODO:  Add appropriate record handling here
-            #     pass
-
-    print_stats(start_time, files_counter, tuning_config)
+            if pending is not None:
+                yield pending[0], pending[1].result()
+            pending = next_read
+        if pending is not None:
+            yield pending[0], pending[1].result()
 
 
 def check_and_move(error_code, file_path, filepath2):
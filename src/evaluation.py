@@ -91,6 +91,27 @@ class AnswerMatcher:
                 self.marking[f"correct-{allowed_answer}"] = parse_float_or_fraction(
                     answer_score
                 )
+        self.set_verdicts_by_answer()
+
+    def set_verdicts_by_answer(self):
+        # Resolved once per question so that matching a response is a single lookup,
+        # any answer missing from this map is "incorrect"
+        answer_type, answer_item = self.answer_type, self.answer_item
+        if answer_type == "standard":
+            verdicts_by_answer = {answer_item: "correct"}
+        elif answer_type == "multiple-correct":
+            verdicts_by_answer = {
+                allowed_answer: f"correct-{allowed_answer}"
+                for allowed_answer in answer_item
+            }
+        elif answer_type == "multiple-correct-weighted":
+            verdicts_by_answer = {
+                allowed_answer: f"correct-{allowed_answer}"
+                for allowed_answer, _answer_score in answer_item
+            }
+        # An empty response is "unmarked" even if it matches an allowed answer
+        verdicts_by_answer[self.empty_val] = "unmarked"
+        self.verdicts_by_answer = verdicts_by_answer
 
     def get_marking_scheme(self):
         return self.section_marking_scheme
@@ -103,45 +124,9 @@ class AnswerMatcher:
             return f"Custom: {self.marking}"
 
     def get_verdict_marking(self, marked_answer):
-        answer_type = self.answer_type
-        question_verdict = "incorrect"
-        if answer_type == "standard":
-            question_verdict = self.get_standard_verdict(marked_answer)
-        elif answer_type == "multiple-correct":
-            question_verdict = self.get_multiple_correct_verdict(marked_answer)
-        elif answer_type == "multiple-correct-weighted":
-            question_verdict = self.get_multiple_correct_weighted_verdict(marked_answer)
+        question_verdict = self.verdicts_by_answer.get(marked_answer, "incorrect")
         return question_verdict, self.marking[question_verdict]
 
-    def get_standard_verdict(self, marked_answer):
-        allowed_answer = self.answer_item
-        if marked_answer == self.empty_val:
-            return "unmarked"
-        elif marked_answer == allowed_answer:
-            return "correct"
-        else:
-            return "incorrect"
-
-    def get_multiple_correct_verdict(self, marked_answer):
-        allowed_answers = self.answer_item
-        if marked_answer == self.empty_val:
-            return "unmarked"
-        elif marked_answer in allowed_answers:
-            return f"correct-{marked_answer}"
-        else:
-            return "incorrect"
-
-    def get_multiple_correct_weighted_verdict(self, marked_answer):
-        allowed_answers = [
-            allowed_answer for allowed_answer, _answer_score in self.answer_item
-        ]
-        if marked_answer == self.empty_val:
-            return "unmarked"
-        elif marked_answer in allowed_answers:
-            return f"correct-{marked_answer}"
-        else:
-            return "incorrect"
-
     def __str__(self):
         return f"{self.answer_item}"
 
@@ -254,7 +239,7 @@ class EvaluationConfig:
                 omr_response = get_concatenated_response(response_dict, template)
 
                 empty_val = template.global_empty_val
-                empty_answer_regex = (
+                empty_answer_pattern = re.compile(
                     rf"{re.escape(empty_val)}+" if empty_val != "" else r"^$"
                 )
 
@@ -265,7 +250,7 @@ class EvaluationConfig:
                     empty_answered_questions = [
                         question
                         for question in self.questions_in_order
-                        if re.search(empty_answer_regex, omr_response[question])
+                        if empty_answer_pattern.search(omr_response[question])
                     ]
                     if len(empty_answered_questions) > 0:
                         logger.error(
@@ -281,7 +266,7 @@ class EvaluationConfig:
                     self.questions_in_order = sorted(
                         question
                         for (question, answer) in omr_response.items()
-                        if not re.search(empty_answer_regex, answer)
+                        if not empty_answer_pattern.search(answer)
                     )
                 answers_in_order = [
                     omr_response[question] for question in self.questions_in_order
@@ -294,6 +279,8 @@ class EvaluationConfig:
             answers_in_order = options["answers_in_order"]
 
         self.validate_questions(answers_in_order)
+        # Reused for validating every omr response
+        self.all_questions = set(self.questions_in_order)
 
         self.section_marking_schemes, self.question_to_scheme = {}, {}
         for section_key, section_scheme in marking_schemes.items():
@@ -323,18 +310,19 @@ class EvaluationConfig:
     def prepare_and_validate_omr_response(self, omr_response):
         self.reset_explanation_table()
 
-        omr_response_questions = set(omr_response.keys())
-        all_questions = set(self.questions_in_order)
-        missing_questions = sorted(all_questions.difference(omr_response_questions))
-        if len(missing_questions) > 0:
+        omr_response_questions = omr_response.keys()
+        all_questions = self.all_questions
+        # Stops at the first missing question, the full list is only built for the error
+        if not omr_response_questions >= all_questions:
+            missing_questions = sorted(all_questions.difference(omr_response_questions))
             logger.critical(f"Missing OMR response for: {missing_questions}")
             raise Exception(
                 f"Some questions are missing in the OMR response for the given answer key"
             )
 
-        prefixed_omr_response_questions = set(
-            [k for k in omr_response.keys() if k.startswith("q")]
-        )
+        prefixed_omr_response_questions = {
+            k for k in omr_response_questions if k.startswith("q")
+        }
         missing_prefixed_questions = sorted(
             prefixed_omr_response_questions.difference(all_questions)
         )
@@ -343,19 +331,6 @@ class EvaluationConfig:
                 f"No answer given for potential questions in OMR response: {missing_prefixed_questions}"
             )
 
-    def match_answer_for_question(self, current_score, question, marked_answer):
-        answer_matcher = self.question_to_answer_matcher[question]
-        question_verdict, delta = answer_matcher.get_verdict_marking(marked_answer)
-        self.conditionally_add_explanation(
-            answer_matcher,
-            delta,
-            marked_answer,
-            question_verdict,
-            question,
-            current_score,
-        )
-        return delta
-
     def conditionally_print_explanation(self):
         if self.should_explain_scoring:
             console.print(self.explanation_table, justify="center")
@@ -533,11 +508,22 @@ def evaluate_concatenated_response(
 ):
     evaluation_config.prepare_and_validate_omr_response(concatenated_response)
     current_score = 0.0
+    question_to_answer_matcher = evaluation_config.question_to_answer_matcher
+    should_explain_scoring = evaluation_config.should_explain_scoring
     for question in evaluation_config.questions_in_order:
         marked_answer = concatenated_response[question]
-        delta = evaluation_config.match_answer_for_question(
-            current_score, question, marked_answer
-        )
+        answer_matcher = question_to_answer_matcher[question]
+        question_verdict, delta = answer_matcher.get_verdict_marking(marked_answer)
+        # Only the deltas are needed when there's no explanation table to fill
+        if should_explain_scoring:
+            evaluation_config.conditionally_add_explanation(
+                answer_matcher,
+                delta,
+                marked_answer,
+                question_verdict,
+                question,
+                current_score,
+            )
         current_score += delta
 
     evaluation_config.conditionally_print_explanation()
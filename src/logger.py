@@ -1,11 +1,22 @@
+from __future__ import annotations
+
 import logging
 from typing import Union
 
+import numpy as np
 from rich.console import Console
 from rich.logging import RichHandler
 
 FORMAT = "%(message)s"
 
+LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
 # TODO: set logging level from config.json dynamically
 logging.basicConfig(
     level=logging.INFO,
@@ -45,8 +56,15 @@ class Logger:
 
     def stringify(func):
         def inner(self, method_type: str, *msg: object, sep=" "):
+            # Skip stringifying the message parts when the level is disabled
+            level = LOG_LEVELS.get(method_type)
+            if level is not None and not self.log.isEnabledFor(level):
+                return None
             nmsg = []
             for v in msg:
+                if isinstance(v, np.ndarray):
+                    # Arrays are logged as the nested lists of their values
+                    v = v.tolist()
                 if not isinstance(v, str):
                     v = str(v)
                 nmsg.append(v)
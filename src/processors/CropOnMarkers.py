@@ -27,7 +27,6 @@ class CropOnMarkers(ImagePreprocessor):
         super().__init__(*args, **kwargs)
         config = self.tuning_config
         marker_ops = self.options
-        self.threshold_circles = []
         # img_utils = ImageUtils()
 
         # options with defaults
@@ -41,7 +40,10 @@ class CropOnMarkers(ImagePreprocessor):
         )
         self.marker_rescale_steps = int(marker_ops.get("marker_rescale_steps", 10))
         self.apply_erode_subtract = marker_ops.get("apply_erode_subtract", True)
+        # erode only reads the kernel's non-zero mask, so an 8-bit one suffices
+        self.erode_kernel = np.ones(EROSION_PARAMS["kernel_size"], np.uint8)
         self.marker = self.load_marker(marker_ops, config)
+        self.rescaled_markers = self.get_rescaled_markers()
 
     def __str__(self):
         return self.marker_path
@@ -51,6 +53,7 @@ class CropOnMarkers(ImagePreprocessor):
 
     def apply_filter(self, image, file_path):
         config = self.tuning_config
+        show_image_level = config.outputs.show_image_level
         image_instance_ops = self.image_instance_ops
         image_eroded_sub = ImageUtils.normalize_util(
             image
@@ -59,7 +62,7 @@ class CropOnMarkers(ImagePreprocessor):
                 image
                 - cv2.erode(
                     image,
-                    kernel=np.ones(EROSION_PARAMS["kernel_size"]),
+                    kernel=self.erode_kernel,
                     iterations=EROSION_PARAMS["iterations"],
                 )
             )
@@ -83,39 +86,44 @@ class CropOnMarkers(ImagePreprocessor):
 
         best_scale, all_max_t = self.getBestMatch(image_eroded_sub)
         if best_scale is None:
-            if config.outputs.show_image_level >= 1:
+            if show_image_level >= 1:
                 InteractionUtils.show("Quads", image_eroded_sub, config=config)
             return None
 
-        optimal_marker = ImageUtils.resize_util_h(
-            self.marker, u_height=int(self.marker.shape[0] * best_scale)
-        )
+        optimal_marker = self.rescaled_markers[best_scale]
         _h, w = optimal_marker.shape[:2]
         centres = []
-        sum_t, max_t = 0, 0
         quarter_match_log = "Matching Marker:  "
+        # Resolved once for the four quadrants
+        min_matching_threshold = self.min_matching_threshold
+        max_matching_variation = self.max_matching_variation
+        marker_rect_color = (
+            ERODE_RECT_COLOR if self.apply_erode_subtract else NORMAL_RECT_COLOR
+        )
         for k in range(0, 4):
             res = cv2.matchTemplate(quads[k], optimal_marker, cv2.TM_CCOEFF_NORMED)
-            max_t = res.max()
+            # The first best match, found in a single pass over res
+            max_index = res.argmax()
+            max_t = res.flat[max_index]
             quarter_match_log += f"Quarter{str(k + 1)}: {str(round(max_t, 3))}\t"
             if (
-                max_t < self.min_matching_threshold
-                or abs(all_max_t - max_t) >= self.max_matching_variation
+                max_t < min_matching_threshold
+                or abs(all_max_t - max_t) >= max_matching_variation
             ):
                 logger.error(
                     file_path,
                     "\nError: No circle found in Quad",
                     k + 1,
                     "\n\t min_matching_threshold",
-                    self.min_matching_threshold,
+                    min_matching_threshold,
                     "\t max_matching_variation",
-                    self.max_matching_variation,
+                    max_matching_variation,
                     "\t max_t",
                     max_t,
                     "\t all_max_t",
                     all_max_t,
                 )
-                if config.outputs.show_image_level >= 1:
+                if show_image_level >= 1:
                     InteractionUtils.show(
                         f"No markers: {file_path}",
                         image_eroded_sub,
@@ -130,7 +138,7 @@ class CropOnMarkers(ImagePreprocessor):
                     )
                 return None
 
-            pt = np.argwhere(res == max_t)[0]
+            pt = np.unravel_index(max_index, res.shape)
             pt = [pt[1], pt[0]]
             pt[0] += origins[k][0]
             pt[1] += origins[k][1]
@@ -147,16 +155,13 @@ class CropOnMarkers(ImagePreprocessor):
                 image_eroded_sub,
                 tuple(pt),
                 (pt[0] + w, pt[1] + _h),
-                ERODE_RECT_COLOR if self.apply_erode_subtract else NORMAL_RECT_COLOR,
+                marker_rect_color,
                 4,
             )
             centres.append([pt[0] + w / 2, pt[1] + _h / 2])
-            sum_t += max_t
 
         logger.info(quarter_match_log)
-        logger.info(f"Optimal Scale: {best_scale}")
-        # analysis data
-        self.threshold_circles.append(sum_t / 4)
+        logger.info("Optimal Scale:", best_scale)
 
         image = ImageUtils.four_point_transform(image, np.array(centres))
         # appendSaveImg(1,image_eroded_sub)
@@ -168,7 +173,7 @@ class CropOnMarkers(ImagePreprocessor):
         # res[ : , midw:midw+2] = 255
         # res[ midh:midh+2, : ] = 255
         # show("Markers Matching",res)
-        if config.outputs.show_image_level >= 2 and config.outputs.show_image_level < 4:
+        if 2 <= show_image_level < 4:
             image_eroded_sub = ImageUtils.resize_util_h(
                 image_eroded_sub, image.shape[0]
             )
@@ -220,23 +225,20 @@ class CropOnMarkers(ImagePreprocessor):
         if self.apply_erode_subtract:
             marker -= cv2.erode(
                 marker,
-                kernel=np.ones(EROSION_PARAMS["kernel_size"]),
+                kernel=self.erode_kernel,
                 iterations=EROSION_PARAMS["iterations"],
             )
 
         return marker
 
-    # Resizing the marker within scaleRange at rate of descent_per_step to
-    # find the best match.
-    def getBestMatch(self, image_eroded_sub):
-        config = self.tuning_config
+    # Resizing the marker within scaleRange at rate of descent_per_step.
+    # The rescaled markers don't depend on the image, so they are built once.
+    def get_rescaled_markers(self):
         descent_per_step = (
             self.marker_rescale_range[1] - self.marker_rescale_range[0]
         ) // self.marker_rescale_steps
         _h, _w = self.marker.shape[:2]
-        res, best_scale = None, None
-        all_max_t = 0
-
+        rescaled_markers = {}
         for r0 in np.arange(
             self.marker_rescale_range[1],
             self.marker_rescale_range[0],
@@ -245,9 +247,18 @@ class CropOnMarkers(ImagePreprocessor):
             s = float(r0 * 1 / 100)
             if s == 0.0:
                 continue
-            rescaled_marker = ImageUtils.resize_util_h(
+            rescaled_markers[s] = ImageUtils.resize_util_h(
                 self.marker, u_height=int(_h * s)
             )
+        return rescaled_markers
+
+    # Matching each rescaled marker to find the best match.
+    def getBestMatch(self, image_eroded_sub):
+        config = self.tuning_config
+        res, best_scale = None, None
+        all_max_t = 0
+
+        for s, rescaled_marker in self.rescaled_markers.items():
             # res is the black image with white dots
             res = cv2.matchTemplate(
                 image_eroded_sub, rescaled_marker, cv2.TM_CCOEFF_NORMED
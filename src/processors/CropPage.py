@@ -62,6 +62,10 @@ class CropPage(ImagePreprocessor):
         self.morph_kernel = tuple(
             int(x) for x in cropping_ops.get("morphKernel", [10, 10])
         )
+        # The structuring element only depends on the options, build it once
+        self.page_closing_kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT, self.morph_kernel
+        )
 
     def apply_filter(self, image, file_path):
         image = normalize(cv2.GaussianBlur(image, DEFAULT_GAUSSIAN_BLUR_KERNEL, 0))
@@ -74,7 +78,7 @@ class CropPage(ImagePreprocessor):
             )
             return None
 
-        logger.info(f"Found page corners: \t {sheet.tolist()}")
+        logger.info("Found page corners: \t", sheet)
 
         # Warp layer 1
         image = ImageUtils.four_point_transform(image, sheet)
@@ -95,10 +99,8 @@ class CropPage(ImagePreprocessor):
         )
         image = normalize(image)
 
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, self.morph_kernel)
-
         # Close the small holes, i.e. Complete the edges on canny image
-        closed = cv2.morphologyEx(image, cv2.MORPH_CLOSE, kernel)
+        closed = cv2.morphologyEx(image, cv2.MORPH_CLOSE, self.page_closing_kernel)
 
         edge = cv2.Canny(
             closed, CANNY_PARAMS["lower_threshold"], CANNY_PARAMS["upper_threshold"]
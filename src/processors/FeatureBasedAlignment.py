@@ -2,6 +2,9 @@
 Image based feature alignment
 Credits: https://www.learnopencv.com/image-alignment-feature-based-using-opencv-c-python/
 """
+import os
+from functools import lru_cache
+
 import cv2
 import numpy as np
 
@@ -20,23 +23,55 @@ class FeatureBasedAlignment(ImagePreprocessor):
         options = self.options
         config = self.tuning_config
 
-        # process reference image
         self.ref_path = self.relative_dir.joinpath(options["reference"])
-        ref_img = cv2.imread(str(self.ref_path), cv2.IMREAD_GRAYSCALE)
-        self.ref_img = ImageUtils.resize_util(
-            ref_img,
-            config.dimensions.processing_width,
-            config.dimensions.processing_height,
-        )
         # get options with defaults
         self.max_features = int(options.get("maxFeatures", DEFAULT_MAX_FEATURES))
         self.good_match_percent = options.get("goodMatchPercent", DEFAULT_GOOD_MATCH_PERCENT)
         self.transform_2_d = options.get("2d", False)
-        # Extract keypoints and description of source image
+        # process reference image
+        # (the file's mtime and size are part of the cache key, so that a changed
+        # reference isn't served from the cache in a long running process)
+        ref_stat = os.stat(self.ref_path)
+        (
+            self.ref_img,
+            self.to_keypoints,
+            self.to_descriptors,
+        ) = self.get_reference_features(
+            str(self.ref_path),
+            ref_stat.st_mtime_ns,
+            ref_stat.st_size,
+            config.dimensions.processing_width,
+            config.dimensions.processing_height,
+            self.max_features,
+        )
         self.orb = cv2.ORB_create(self.max_features)
-        self.to_keypoints, self.to_descriptors = self.orb.detectAndCompute(
-            self.ref_img, None
+        # The matcher keeps no state between match() calls, so create it once
+        self.matcher = cv2.DescriptorMatcher_create(
+            cv2.DESCRIPTOR_MATCHER_BRUTEFORCE_HAMMING
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def get_reference_features(
+        ref_path,
+        _ref_mtime_ns,
+        _ref_size,
+        processing_width,
+        processing_height,
+        max_features,
+    ):
+        # Extract keypoints and description of the reference image (cached, as
+        # templates of different directories often share the same reference)
+        ref_img = cv2.imread(ref_path, cv2.IMREAD_GRAYSCALE)
+        ref_img = ImageUtils.resize_util(ref_img, processing_width, processing_height)
+        to_keypoints, to_descriptors = cv2.ORB_create(max_features).detectAndCompute(
+            ref_img, None
         )
+        # The cached arrays are shared by every instance, so they're made read-only
+        ref_img.setflags(write=False)
+        if to_descriptors is not None:
+            to_descriptors.setflags(write=False)
+        return ref_img, to_keypoints, to_descriptors
 
     def __str__(self):
         return self.ref_path.name
@@ -56,14 +91,12 @@ class FeatureBasedAlignment(ImagePreprocessor):
         from_keypoints, from_descriptors = self.orb.detectAndCompute(image, None)
 
         # Match features.
-        matcher = cv2.DescriptorMatcher_create(
-            cv2.DESCRIPTOR_MATCHER_BRUTEFORCE_HAMMING
-        )
-
         # create BFMatcher object (alternate matcher)
         # matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
 
-        matches = np.array(matcher.match(from_descriptors, self.to_descriptors, None))
+        matches = np.array(
+            self.matcher.match(from_descriptors, self.to_descriptors, None)
+        )
 
         # Sort matches by score
         matches = sorted(matches, key=lambda x: x.distance, reverse=False)
@@ -11,6 +11,8 @@ from src.logger import logger
 class Processor:
     """Base class that each processor must inherit from."""
 
+    description = "UNKNOWN"
+
     def __init__(
         self,
         options=None,
@@ -21,7 +23,6 @@ class Processor:
         self.relative_dir = relative_dir
         self.image_instance_ops = image_instance_ops
         self.tuning_config = image_instance_ops.tuning_config
-        self.description = "UNKNOWN"
 
 
 class ProcessorManager:
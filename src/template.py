@@ -6,6 +6,8 @@
  Github: https://github.com/Udayraj123
 
 """
+import numpy as np
+
 from src.constants.common import FIELD_TYPES
 from src.core import ImageInstanceOps
 from src.logger import logger
@@ -82,6 +84,30 @@ class Template:
         self.all_parsed_labels = set()
         for block_name, field_block_object in field_blocks_object.items():
             self.parse_and_add_field_block(block_name, field_block_object)
+        self.setup_sheet_bubbles()
+
+    def setup_sheet_bubbles(self):
+        # Bubble boxes of all field blocks in a row, so that a sheet is read in one go
+        field_blocks = self.field_blocks
+        if len(field_blocks) == 0:
+            self.block_bubbles_counts = []
+            self.all_bubble_xs, self.all_bubble_ys = np.empty((2, 0), dtype=int)
+            self.all_bubble_ws, self.all_bubble_hs = np.empty((2, 0), dtype=int)
+            return
+        self.block_bubbles_counts = [
+            field_block.bubble_xs.size for field_block in field_blocks
+        ]
+        self.all_bubble_xs = np.concatenate(
+            [field_block.bubble_xs.ravel() for field_block in field_blocks]
+        )
+        self.all_bubble_ys = np.concatenate(
+            [field_block.bubble_ys.ravel() for field_block in field_blocks]
+        )
+        block_bubble_ws, block_bubble_hs = zip(
+            *(field_block.bubble_dimensions for field_block in field_blocks)
+        )
+        self.all_bubble_ws = np.repeat(block_bubble_ws, self.block_bubbles_counts)
+        self.all_bubble_hs = np.repeat(block_bubble_hs, self.block_bubbles_counts)
 
     def parse_custom_labels(self, custom_labels_object):
         all_parsed_custom_labels = set()
@@ -213,6 +239,8 @@ class FieldBlock:
     def __init__(self, block_name, field_block_object):
         self.name = block_name
         self.shift = 0
+        # Drawing boxes of the bubbles, filled in while reading sheets
+        self.inset_boxes_by_shift = {}
         self.setup_field_block(field_block_object)
 
     def setup_field_block(self, field_block_object):
@@ -292,6 +320,8 @@ class FieldBlock:
         labels_gap,
     ):
         _h, _v = (1, 0) if (direction == "vertical") else (0, 1)
+        # Every field of the block has the same values, in bubble order
+        self.bubble_values = bubble_values
         self.traverse_bubbles = []
         # Generate the bubble grid
         lead_point = [float(self.origin[0]), float(self.origin[1])]
@@ -305,6 +335,17 @@ class FieldBlock:
                 bubble_point[_h] += bubbles_gap
             self.traverse_bubbles.append(field_bubbles)
             lead_point[_v] += labels_gap
+        # Bubble positions as (fields x values) arrays to read the block at once,
+        # the explicit shape keeps them 2D integer arrays for a block without fields
+        grid_shape = (len(self.traverse_bubbles), len(bubble_values))
+        self.bubble_xs = np.array(
+            [[bubble.x for bubble in bubbles] for bubbles in self.traverse_bubbles],
+            dtype=int,
+        ).reshape(grid_shape)
+        self.bubble_ys = np.array(
+            [[bubble.y for bubble in bubbles] for bubbles in self.traverse_bubbles],
+            dtype=int,
+        ).reshape(grid_shape)
 
 
 class Bubble:
@@ -316,6 +357,9 @@ class Bubble:
     It can also correspond to a single digit of integer type Q (eg q5d1)
     """
 
+    # One instance is created per bubble of the template
+    __slots__ = ("x", "y", "field_label", "field_type", "field_value")
+
     def __init__(self, pt, field_label, field_type, field_value):
         self.x = round(pt[0])
         self.y = round(pt[1])
@@ -0,0 +1,71 @@
+from copy import deepcopy
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core import ImageInstanceOps
+from src.defaults import CONFIG_DEFAULTS
+from src.utils.image import ImageWriter
+
+get_largest_jump = ImageInstanceOps.get_largest_jump
+
+
+def largest_jump_loop(q_vals, span, min_jump, default_thr):
+    # The scan get_largest_jump replaced
+    max1, thr1 = min_jump, default_thr
+    for i in range(span, len(q_vals) - span):
+        jump = q_vals[i + span] - q_vals[i - span]
+        if jump > max1:
+            max1 = jump
+            thr1 = q_vals[i - span] + jump / 2
+    return max1, thr1
+
+
+@pytest.mark.parametrize("span", [1, 2, 3])
+def test_largest_jump_matches_the_loop(span):
+    rng = np.random.default_rng(span)
+    for size in range(12):
+        q_vals = np.sort(rng.integers(0, 256, size).astype(float))
+        assert get_largest_jump(q_vals, span, 30, 200) == pytest.approx(
+            largest_jump_loop(q_vals, span, 30, 200)
+        )
+
+
+def test_largest_jump_thresholds():
+    q_vals = np.array([40.0, 45.0, 50.0, 130.0, 140.0, 150.0])
+
+    # The jump between 50 and 140 is the largest, the threshold is at its middle
+    assert get_largest_jump(q_vals, 1, 30, 200) == (90.0, 95.0)
+    # Jumps that don't exceed min_jump fall back to the default threshold
+    assert get_largest_jump(q_vals, 1, 90, 200) == (90, 200)
+    assert get_largest_jump(q_vals, 1, 89.5, 200) == (90.0, 95.0)
+    # Too few values to compare at this span
+    assert get_largest_jump(q_vals, 3, 30, 200) == (30, 200)
+
+
+def test_largest_jump_takes_the_first_of_equal_jumps():
+    q_vals = np.array([0.0, 0.0, 100.0, 100.0, 200.0, 200.0])
+
+    assert get_largest_jump(q_vals, 1, 30, 255) == (100.0, 50.0)
+
+
+def test_image_stacks_are_saved_in_the_stack_dir(tmp_path):
+    tuning_config = deepcopy(CONFIG_DEFAULTS)
+    tuning_config.outputs.save_image_level = 2
+    image_instance_ops = ImageInstanceOps(tuning_config)
+    save_dir = tmp_path.joinpath("CheckedOMRs")
+    save_dir.joinpath("stack").mkdir(parents=True)
+
+    image_instance_ops.reset_all_save_img()
+    for key in [1, 2, 2]:
+        image_instance_ops.append_save_img(key, np.zeros((40, 30), dtype=np.uint8))
+    image_writer = ImageWriter()
+    for key in [1, 2]:
+        image_instance_ops.save_image_stacks(key, "sheet", save_dir, image_writer)
+    image_writer.close()
+
+    for key in [1, 2]:
+        stack_path = save_dir.joinpath("stack", f"sheet_{key}_stack.jpg")
+        assert cv2.imread(str(stack_path)) is not None
+    assert sorted(path.name for path in save_dir.iterdir()) == ["stack"]
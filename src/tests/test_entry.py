@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.defaults import CONFIG_DEFAULTS
+from src.entry import process_files, read_images_ahead
+from src.utils.file import Paths, setup_dirs_for_paths, setup_outputs_for_template
+from src.tests.utils import MCQ_TEMPLATE_BOILERPLATE, load_template
+from src.utils.parsing import get_concatenated_response
+
+
+def write_sheets(input_dir, count):
+    input_dir.mkdir()
+    page_w, page_h = MCQ_TEMPLATE_BOILERPLATE["pageDimensions"]
+    sheet = np.full((page_h, page_w), 255, dtype=np.uint8)
+    omr_files = []
+    for i in range(count):
+        file_path = input_dir.joinpath(f"sheet{i}.png")
+        cv2.imwrite(str(file_path), sheet)
+        omr_files.append(file_path)
+    return omr_files
+
+
+def test_rows_are_flushed_when_a_sheet_fails(tmp_path, mocker):
+    template = load_template(tmp_path)
+    omr_files = write_sheets(tmp_path.joinpath("inputs"), 3)
+
+    paths = Paths(tmp_path.joinpath("outputs"))
+    setup_dirs_for_paths(paths)
+    outputs_namespace = setup_outputs_for_template(paths, template)
+
+    def fail_on_second_sheet(omr_response, template):
+        if mock_get_response.call_count == 2:
+            raise RuntimeError("Could not read the sheet")
+        return get_concatenated_response(omr_response, template)
+
+    mock_get_response = mocker.patch(
+        "src.entry.get_concatenated_response", side_effect=fail_on_second_sheet
+    )
+
+    with pytest.raises(RuntimeError):
+        process_files(omr_files, template, CONFIG_DEFAULTS, None, outputs_namespace)
+
+    # The first sheet's row is written even though the run stopped at the second
+    results = pd.read_csv(outputs_namespace.filesMap["Results"], dtype=str)
+    assert results["file_id"].to_list() == ["sheet0.png"]
+    assert outputs_namespace.pending_rows["Results"] == []
+
+
+def test_images_are_read_ahead_in_order(tmp_path):
+    input_dir = tmp_path.joinpath("inputs")
+    input_dir.mkdir()
+    omr_files = []
+    for i in range(4):
+        file_path = input_dir.joinpath(f"sheet{i}.png")
+        cv2.imwrite(str(file_path), np.full((20, 30), i * 50, dtype=np.uint8))
+        omr_files.append(file_path)
+    # An unreadable file is still yielded in its place, like cv2.imread gives None
+    omr_files.insert(2, input_dir.joinpath("missing.png"))
+
+    read_files = list(read_images_ahead(omr_files))
+
+    assert [file_path for file_path, _ in read_files] == omr_files
+    for file_path, image in read_files:
+        expected = cv2.imread(str(file_path), cv2.IMREAD_GRAYSCALE)
+        if expected is None:
+            assert image is None
+        else:
+            assert np.array_equal(image, expected)
+    assert list(read_images_ahead([])) == []
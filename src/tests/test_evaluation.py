@@ -0,0 +1,66 @@
+import pytest
+
+from src.defaults import CONFIG_DEFAULTS
+from src.evaluation import EvaluationConfig, evaluate_concatenated_response
+from src.tests.utils import load_template, write_modified
+
+EVALUATION_JSON = {
+    "source_type": "custom",
+    "options": {
+        "questions_in_order": ["q1..6"],
+        "answers_in_order": ["A", ["B", "C"], [["D", 2], ["AB", 1]], "C", "E", "A"],
+    },
+    "marking_schemes": {
+        "DEFAULT": {"correct": "3", "incorrect": "-1", "unmarked": "0"},
+        "BONUS": {
+            "questions": ["q5", "q6"],
+            "marking": {"correct": "2", "incorrect": "0", "unmarked": "1"},
+        },
+    },
+}
+# correct, multiple-correct, weighted partial, incorrect, bonus correct, bonus unmarked
+CONCATENATED_RESPONSE = {
+    "q1": "A",
+    "q2": "C",
+    "q3": "AB",
+    "q4": "D",
+    "q5": "E",
+    "q6": "",
+}
+EXPECTED_SCORE = 3 + 3 + 1 - 1 + 2 + 1
+
+
+def add_bonus_questions(template):
+    # Five options for the "E" answer of q5, and three more questions
+    mcq_block = template["fieldBlocks"]["MCQBlock1"]
+    mcq_block["fieldType"] = "QTYPE_MCQ5"
+    mcq_block["fieldLabels"] = ["q1..6"]
+
+
+@pytest.mark.parametrize("should_explain_scoring", [False, True])
+def test_score_does_not_depend_on_explanation(tmp_path, should_explain_scoring):
+    template = load_template(tmp_path, modify_template=add_bonus_questions)
+
+    def set_should_explain_scoring(evaluation):
+        evaluation["options"]["should_explain_scoring"] = should_explain_scoring
+
+    evaluation_path = tmp_path.joinpath("evaluation.json")
+    write_modified(set_should_explain_scoring, EVALUATION_JSON, evaluation_path)
+    evaluation_config = EvaluationConfig(
+        tmp_path, evaluation_path, template, CONFIG_DEFAULTS
+    )
+
+    score = evaluate_concatenated_response(
+        dict(CONCATENATED_RESPONSE),
+        evaluation_config,
+        tmp_path.joinpath("sheet.png"),
+        tmp_path,
+    )
+
+    assert score == EXPECTED_SCORE
+    if should_explain_scoring:
+        assert evaluation_config.explanation_table.row_count == len(
+            CONCATENATED_RESPONSE
+        )
+    else:
+        assert evaluation_config.explanation_table is None
@@ -0,0 +1,35 @@
+import os
+
+import cv2
+import numpy as np
+
+from src.core import ImageInstanceOps
+from src.defaults import CONFIG_DEFAULTS
+from src.processors.manager import PROCESSOR_MANAGER
+
+FeatureBasedAlignment = PROCESSOR_MANAGER.processors["FeatureBasedAlignment"]
+
+
+def write_reference(path, seed):
+    noise = np.random.default_rng(seed).integers(0, 256, (400, 300), dtype=np.uint8)
+    cv2.imwrite(str(path), cv2.GaussianBlur(noise, (5, 5), 0))
+
+
+def test_reference_features_follow_the_file(tmp_path):
+    ref_path = tmp_path.joinpath("reference.png")
+    options = {"reference": ref_path.name}
+    image_instance_ops = ImageInstanceOps(CONFIG_DEFAULTS)
+
+    write_reference(ref_path, seed=0)
+    first = FeatureBasedAlignment(options, tmp_path, image_instance_ops)
+    same = FeatureBasedAlignment(options, tmp_path, image_instance_ops)
+    # The cached reference is shared, and can't be modified through an instance
+    assert same.to_descriptors is first.to_descriptors
+    assert not first.ref_img.flags.writeable
+    assert not first.to_descriptors.flags.writeable
+
+    write_reference(ref_path, seed=1)
+    ref_stat = os.stat(ref_path)
+    os.utime(ref_path, ns=(ref_stat.st_atime_ns, ref_stat.st_mtime_ns + 10**9))
+    edited = FeatureBasedAlignment(options, tmp_path, image_instance_ops)
+    assert not np.array_equal(edited.ref_img, first.ref_img)
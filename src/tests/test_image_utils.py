@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.utils.image import ImageUtils, ImageWriter
+
+
+def test_image_writer_reports_failed_writes(tmp_path, mocker):
+    mock_error = mocker.patch("src.utils.image.logger.error")
+    image = np.zeros((8, 8), dtype=np.uint8)
+    saved_path = str(tmp_path.joinpath("saved.png"))
+    missing_dir_path = str(tmp_path.joinpath("missing", "saved.png"))
+    unknown_format_path = str(tmp_path.joinpath("saved.unknown"))
+
+    image_writer = ImageWriter()
+    for path in [saved_path, missing_dir_path, unknown_format_path]:
+        ImageUtils.save_img(path, image, image_writer)
+    image_writer.close()
+
+    assert np.array_equal(cv2.imread(saved_path, cv2.IMREAD_GRAYSCALE), image)
+    failed_paths = [call.args[0] for call in mock_error.call_args_list]
+    assert len(failed_paths) == 2
+    assert missing_dir_path in failed_paths[0]
+    assert unknown_format_path in failed_paths[1]
+    assert image_writer.pending_writes == []
+
+
+def test_slice_bounds_match_python_slicing():
+    length = 10
+    bounds = np.arange(-14, 15)
+    starts, stops = np.meshgrid(bounds, bounds)
+    starts, stops = starts.ravel(), stops.ravel()
+
+    slice_starts, slice_stops = ImageUtils.get_slice_bounds(starts, stops, length)
+
+    for start, stop, slice_start, slice_stop in zip(
+        starts, stops, slice_starts, slice_stops
+    ):
+        expected = range(length)[start:stop]
+        assert slice_stop - slice_start == len(expected)
+        if len(expected) > 0:
+            assert (slice_start, slice_stop) == (expected[0], expected[-1] + 1)
+
+
+def test_boxes_mean_matches_mean_of_image_slice():
+    img = np.random.default_rng(0).integers(0, 256, (60, 80), dtype=np.uint8)
+    box_w, box_h = 12, 9
+    # Boxes inside the image, on its borders, past its edges and fully outside
+    xs = np.array([0, 30, 75, -5, 85, 68, 0])
+    ys = np.array([0, 20, 55, 3, 10, -20, 51])
+
+    means = ImageUtils.get_boxes_mean(cv2.integral(img), xs, ys, box_w, box_h)
+
+    for x, y, mean in zip(xs, ys, means):
+        box = img[y : y + box_h, x : x + box_w]
+        assert mean == pytest.approx(cv2.mean(box)[0])
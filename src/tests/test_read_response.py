@@ -0,0 +1,71 @@
+import numpy as np
+
+from src.tests.utils import MCQ_TEMPLATE_BOILERPLATE, load_template
+
+MCQ_BLOCK = MCQ_TEMPLATE_BOILERPLATE["fieldBlocks"]["MCQBlock1"]
+BUBBLE_SIZE = MCQ_TEMPLATE_BOILERPLATE["bubbleDimensions"][0]
+BUBBLES_GAP, ORIGIN = MCQ_BLOCK["bubblesGap"], MCQ_BLOCK["origin"]
+MARKED_ANSWERS = {"q1": "A", "q2": "C", "q3": "D"}
+
+
+def bubble_origin(question_index, value_index):
+    return (
+        ORIGIN[0] + value_index * BUBBLES_GAP,
+        ORIGIN[1] + question_index * BUBBLES_GAP,
+    )
+
+
+def read_sheet(tmp_path, modify_template=None):
+    template = load_template(tmp_path, modify_template)
+
+    page_w, page_h = MCQ_TEMPLATE_BOILERPLATE["pageDimensions"]
+    image = np.full((page_h, page_w), 255, dtype=np.uint8)
+    for question_index, answer in enumerate(MARKED_ANSWERS.values()):
+        x, y = bubble_origin(question_index, "ABCD".index(answer))
+        image[y : y + BUBBLE_SIZE, x : x + BUBBLE_SIZE] = 0
+
+    (
+        response,
+        final_marked,
+        multi_marked,
+        _,
+    ) = template.image_instance_ops.read_omr_response(
+        template=template, image=image, name="sheet.png"
+    )
+    return response, final_marked, multi_marked
+
+
+def test_read_marked_bubbles(tmp_path):
+    response, _, multi_marked = read_sheet(tmp_path)
+
+    assert response == MARKED_ANSWERS
+    assert not multi_marked
+
+
+def test_read_with_a_block_without_fields(tmp_path):
+    def add_empty_block(template):
+        template["fieldBlocks"]["EmptyBlock"] = {
+            "fieldType": "QTYPE_MCQ4",
+            "origin": [50, 200],
+            "bubblesGap": BUBBLES_GAP,
+            "labelsGap": BUBBLES_GAP,
+            "fieldLabels": [],
+        }
+
+    response, _, multi_marked = read_sheet(tmp_path, add_empty_block)
+
+    assert response == MARKED_ANSWERS
+    assert not multi_marked
+
+
+def test_unmarked_bubbles_drawn_on_their_own_box(tmp_path):
+    _, final_marked, _ = read_sheet(tmp_path)
+
+    centre = BUBBLE_SIZE // 2
+    for question_index, answer in enumerate(MARKED_ANSWERS.values()):
+        for value_index, value in enumerate("ABCD"):
+            if value == answer:
+                continue
+            x, y = bubble_origin(question_index, value_index)
+            # Unmarked boxes are filled in gray, the page around them is white
+            assert final_marked[y + centre, x + centre] < 255
@@ -4,6 +4,7 @@ from pathlib import Path
 from src.tests.test_samples.sample1.boilerplate import TEMPLATE_BOILERPLATE
 from src.tests.utils import (
     generate_write_jsons_and_run,
+    load_template,
     run_entry_point,
     setup_mocker_patches,
 )
@@ -157,3 +158,13 @@ def test_safe_missing_label_columns(mocker):
 
     exception = write_jsons_and_run(mocker, modify_template=modify_template)
     assert str(exception) == "No Error"
+
+
+def test_no_field_blocks(tmp_path):
+    def modify_template(template):
+        template["fieldBlocks"] = {}
+
+    template = load_template(tmp_path, modify_template=modify_template)
+    assert template.output_columns == []
+    assert template.block_bubbles_counts == []
+    assert template.all_bubble_xs.size == 0
@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("reportlab")
+
+from web.services.marker import MarkedSheet, QuestionResult, SubjectResult  # noqa: E402
+from web.services.results import build_student_files  # noqa: E402
+
+CONCEPT_MAPPING = {
+    "Reading": {"Inference": ["1", "2"]},
+    "QR": {"Fractions": ["1", "2"]},
+    "AR": {"Patterns": ["1"]},
+}
+
+
+def marked_sheet(subject, answers):
+    questions = [
+        QuestionResult(
+            question_id=str(i + 1),
+            selected=selected,
+            correct=correct,
+            is_correct=selected == correct,
+        )
+        for i, (selected, correct) in enumerate(answers)
+    ]
+    result = SubjectResult(
+        subject=subject,
+        total=len(questions),
+        correct=sum(question.is_correct for question in questions),
+        questions=questions,
+    )
+    return MarkedSheet(
+        subject=subject,
+        responses={question.question_id: question.selected for question in questions},
+        result=result,
+        marked_image=np.full((200, 700), 255, dtype=np.uint8),
+    )
+
+
+def test_build_student_files():
+    student_files = build_student_files(
+        student_name="Jane Doe",
+        writing_score=7,
+        reading_marked=marked_sheet("Reading", [("A", "A"), ("B", "C")]),
+        qrar_marked_list=[
+            marked_sheet("QR", [("A", "A"), ("D", "D")]),
+            marked_sheet("AR", [("", "B")]),
+        ],
+        concept_mapping=CONCEPT_MAPPING,
+    )
+
+    assert set(student_files) == {
+        "reading_marked.pdf",
+        "qrar_marked.pdf",
+        "report.pdf",
+        "results.json",
+    }
+    for suffix in ["reading_marked.pdf", "qrar_marked.pdf", "report.pdf"]:
+        assert student_files[suffix].startswith(b"%PDF")
+
+    results = json.loads(student_files["results.json"])
+    assert results["student"] == "Jane Doe"
+    assert results["writing_score"] == 7
+    assert (results["reading"]["correct"], results["reading"]["total"]) == (1, 2)
+    assert {
+        subject: (result["correct"], result["total"])
+        for subject, result in results["qrar"].items()
+    } == {"QR": (2, 2), "AR": (0, 1)}
+    assert results["analysis"] == {
+        "Reading": [
+            {
+                "area": "Inference",
+                "correct": 1,
+                "total": 2,
+                "percentage": 50.0,
+                "status": "Needs improvement",
+            }
+        ],
+        "QR": [
+            {
+                "area": "Fractions",
+                "correct": 2,
+                "total": 2,
+                "percentage": 100.0,
+                "status": "Done well",
+            }
+        ],
+        "AR": [
+            {
+                "area": "Patterns",
+                "correct": 0,
+                "total": 1,
+                "percentage": 0.0,
+                "status": "Needs improvement",
+            }
+        ],
+    }
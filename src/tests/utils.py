@@ -5,9 +5,28 @@ from copy import deepcopy
 from freezegun import freeze_time
 
 from main import entry_point_for_args
+from src.defaults import CONFIG_DEFAULTS
+from src.template import Template
 
 FROZEN_TIMESTAMP = "1970-01-01"
 
+# A single block of 4-option questions on a blank page, for tests that build
+# their own sheets instead of reading a sample
+MCQ_TEMPLATE_BOILERPLATE = {
+    "pageDimensions": [300, 400],
+    "bubbleDimensions": [20, 20],
+    "preProcessors": [],
+    "fieldBlocks": {
+        "MCQBlock1": {
+            "fieldType": "QTYPE_MCQ4",
+            "origin": [50, 50],
+            "bubblesGap": 40,
+            "labelsGap": 40,
+            "fieldLabels": ["q1..3"],
+        },
+    },
+}
+
 
 def setup_mocker_patches(mocker):
     mock_imshow = mocker.patch("cv2.imshow")
@@ -48,6 +67,12 @@ def write_modified(modify_content, boilerplate, sample_json_path):
         json.dump(content, f)
 
 
+def load_template(template_dir, modify_template=None, tuning_config=CONFIG_DEFAULTS):
+    template_path = template_dir.joinpath("template.json")
+    write_modified(modify_template, MCQ_TEMPLATE_BOILERPLATE, template_path)
+    return Template(template_path, tuning_config)
+
+
 def remove_file(path):
     if os.path.exists(path):
         os.remove(path)
@@ -66,8 +66,8 @@ def setup_outputs_for_template(paths, template):
         "output_path",
         "score",
     ] + template.output_columns
-    ns.OUTPUT_SET = []
     ns.files_obj = {}
+    ns.pending_rows = {}
     TIME_NOW_HRS = strftime("%I%p", localtime())
     ns.filesMap = {
         "Results": os.path.join(paths.results_dir, f"Results_{TIME_NOW_HRS}.csv"),
@@ -76,6 +76,7 @@ def setup_outputs_for_template(paths, template):
     }
 
     for file_key, file_name in ns.filesMap.items():
+        ns.pending_rows[file_key] = []
         if not os.path.exists(file_name):
             logger.info(f"Created new file: '{file_name}'")
             # moved handling of files to pandas csv writer
@@ -93,3 +94,17 @@ def setup_outputs_for_template(paths, template):
             ns.files_obj[file_key] = open(file_name, "a")
 
     return ns
+
+
+def flush_pending_rows(ns):
+    for file_key, rows in ns.pending_rows.items():
+        if len(rows) == 0:
+            continue
+        pd.DataFrame(rows, dtype=str).to_csv(
+            ns.files_obj[file_key],
+            mode="a",
+            quoting=QUOTE_NONNUMERIC,
+            header=False,
+            index=False,
+        )
+        rows.clear()
@@ -6,23 +6,62 @@
  Github: https://github.com/Udayraj123
 
 """
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 
 from src.logger import logger
 
-plt.rcParams["figure.figsize"] = (10.0, 8.0)
 CLAHE_HELPER = cv2.createCLAHE(clipLimit=5.0, tileGridSize=(8, 8))
 
 
+class ImageWriter:
+    """Writes images on a worker thread, keeping each write to check it on close"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending_writes = []
+
+    def write(self, path, image, params=()):
+        # The image isn't modified after it's passed here
+        self.pending_writes.append(
+            (path, self.executor.submit(cv2.imwrite, path, image, params))
+        )
+
+    def close(self):
+        # Wait for the pending writes, and report the ones that didn't succeed
+        self.executor.shutdown(wait=True)
+        for path, pending_write in self.pending_writes:
+            error = pending_write.exception()
+            if error is not None:
+                logger.error(f"Failed to save image to '{path}': {error}")
+            elif not pending_write.result():
+                logger.error(f"Failed to save image to '{path}'")
+        self.pending_writes.clear()
+
+
 class ImageUtils:
     """A Static-only Class to hold common image processing utilities & wrappers over OpenCV functions"""
 
     @staticmethod
-    def save_img(path, final_marked):
+    @lru_cache(maxsize=None)
+    def get_pyplot():
+        # matplotlib is only needed for the debug plots, so it's imported on first use
+        import matplotlib.pyplot as plt
+
+        plt.rcParams["figure.figsize"] = (10.0, 8.0)
+        return plt
+
+    @staticmethod
+    def save_img(path, final_marked, image_writer=None, params=()):
         logger.info(f"Saving Image to '{path}'")
-        cv2.imwrite(path, final_marked)
+        if image_writer is None:
+            cv2.imwrite(path, final_marked, params)
+        else:
+            # Encoded and written on the writer's thread
+            image_writer.write(path, final_marked, params)
 
     @staticmethod
     def resize_util(img, u_width, u_height=None):
@@ -68,6 +107,42 @@ class ImageUtils:
         # return the actual contours array
         return cnts
 
+    @staticmethod
+    def get_boxes_mean(integral_img, xs, ys, box_w, box_h):
+        """
+        Mean intensity of every box_w x box_h box with top-left corners (xs, ys),
+        read from the integral image of a single-channel image.
+        Gives the same values as cv2.mean(img[y : y + box_h, x : x + box_w]).
+        """
+        sums, areas = ImageUtils.get_boxes_sum(integral_img, xs, ys, box_w, box_h)
+        # Empty boxes have a zero sum, hence a zero mean like in cv2.mean
+        return sums * (1.0 / np.maximum(areas, 1))
+
+    @staticmethod
+    def get_boxes_sum(integral_img, xs, ys, box_w, box_h):
+        """
+        Sum of intensities and area of every box_w x box_h box with top-left
+        corners (xs, ys), read from the integral image of a single-channel image.
+        Boxes are clipped like img[y : y + box_h, x : x + box_w] would be.
+        """
+        height, width = integral_img.shape[0] - 1, integral_img.shape[1] - 1
+        x1, x2 = ImageUtils.get_slice_bounds(xs, xs + box_w, width)
+        y1, y2 = ImageUtils.get_slice_bounds(ys, ys + box_h, height)
+        sums = (
+            integral_img[y2, x2]
+            - integral_img[y1, x2]
+            - integral_img[y2, x1]
+            + integral_img[y1, x1]
+        )
+        return sums, (x2 - x1) * (y2 - y1)
+
+    @staticmethod
+    def get_slice_bounds(starts, stops, length):
+        # Vectorised form of the bounds python uses for seq[start:stop]
+        starts = np.where(starts < 0, starts + length, starts).clip(0, length)
+        stops = np.where(stops < 0, stops + length, stops).clip(0, length)
+        return starts, np.maximum(starts, stops)
+
     @staticmethod
     def normalize_util(img, alpha=0, beta=255):
         return cv2.normalize(img, alpha, beta, norm_type=cv2.NORM_MINMAX)
@@ -87,35 +162,32 @@ class ImageUtils:
 
     @staticmethod
     def adjust_gamma(image, gamma=1.0):
+        # apply gamma correction using the lookup table
+        return cv2.LUT(image, ImageUtils.get_gamma_table(gamma))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_gamma_table(gamma):
         # build a lookup table mapping the pixel values [0, 255] to
-        # their adjusted gamma values
+        # their adjusted gamma values (cached, as gamma rarely changes)
         inv_gamma = 1.0 / gamma
-        table = np.array(
+        return np.array(
             [((i / 255.0) ** inv_gamma) * 255 for i in np.arange(0, 256)]
         ).astype("uint8")
 
-        # apply gamma correction using the lookup table
-        return cv2.LUT(image, table)
-
     @staticmethod
     def four_point_transform(image, pts):
         # obtain a consistent order of the points and unpack them
         # individually
         rect = ImageUtils.order_points(pts)
-        (tl, tr, br, bl) = rect
 
-        # compute the width of the new image, which will be the
-        width_a = np.sqrt(((br[0] - bl[0]) ** 2) + ((br[1] - bl[1]) ** 2))
-        width_b = np.sqrt(((tr[0] - tl[0]) ** 2) + ((tr[1] - tl[1]) ** 2))
+        # compute the lengths of the top, right, bottom and left edges at once,
+        # the new image is as wide and tall as the longest of the opposite edges
+        edges = rect - np.roll(rect, -1, axis=0)
+        width_b, height_a, width_a, height_b = np.sqrt((edges**2).sum(axis=1))
 
         max_width = max(int(width_a), int(width_b))
-        # max_width = max(int(np.linalg.norm(br-bl)), int(np.linalg.norm(tr-tl)))
-
-        # compute the height of the new image, which will be the
-        height_a = np.sqrt(((tr[0] - br[0]) ** 2) + ((tr[1] - br[1]) ** 2))
-        height_b = np.sqrt(((tl[0] - bl[0]) ** 2) + ((tl[1] - bl[1]) ** 2))
         max_height = max(int(height_a), int(height_b))
-        # max_height = max(int(np.linalg.norm(tr-br)), int(np.linalg.norm(tl-br)))
 
         # now that we have the dimensions of the new image, construct
         # the set of destination points to obtain a "birds eye view",
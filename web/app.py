@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
+import logging
 
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, JSONResponse
@@ -8,12 +10,27 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from web.routes import auth, batch, dashboard, marking
+from web.services import get_marking_service
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 TEMPLATES_DIR = ROOT_DIR / "web" / "templates"
 STATIC_DIR = ROOT_DIR / "web" / "static"
 
-app = FastAPI(title="Everest Tutoring ASET Marking")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Parse the templates and reference images before the first upload arrives
+    try:
+        get_marking_service()
+    except Exception:
+        # The app still serves its other pages, the marking routes retry the setup
+        logger.exception("Could not set up the marking service at startup")
+    yield
+
+
+app = FastAPI(title="Everest Tutoring ASET Marking", lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
@@ -3,6 +3,7 @@ from web.services.analysis import (
     SubjectAnalysis,
     LearningAreaResult,
     analyze_results,
+    normalize_concept_mapping,
     summarize_strengths,
 )
 from web.services.annotator import annotate_sheet, image_to_pdf_bytes
@@ -12,15 +13,18 @@ from web.services.marker import (
     MarkingError,
     QuestionResult,
     SubjectResult,
+    get_marking_service,
     parse_answer_key,
 )
 from web.services.report import generate_student_report
+from web.services.results import build_student_files, slugify
 
 __all__ = [
     "FullAnalysis",
     "SubjectAnalysis",
     "LearningAreaResult",
     "analyze_results",
+    "normalize_concept_mapping",
     "summarize_strengths",
     "annotate_sheet",
     "image_to_pdf_bytes",
@@ -29,6 +33,9 @@ __all__ = [
     "MarkingError",
     "QuestionResult",
     "SubjectResult",
+    "get_marking_service",
     "parse_answer_key",
     "generate_student_report",
+    "build_student_files",
+    "slugify",
 ]
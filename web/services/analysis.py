@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from operator import attrgetter
 from typing import Dict, Iterable, List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -12,6 +13,9 @@ THRESHOLD = 0.51
 
 @dataclass
 class LearningAreaResult:
+    # One instance per learning area of every analysed sheet
+    __slots__ = ("name", "correct", "total", "percentage", "status")
+
     name: str
     correct: int
     total: int
@@ -21,6 +25,9 @@ class LearningAreaResult:
 
 @dataclass
 class SubjectAnalysis:
+    # One instance per subject of every analysed student
+    __slots__ = ("subject", "areas")
+
     subject: str
     areas: List[LearningAreaResult]
 
@@ -34,7 +41,7 @@ class AnalysisError(Exception):
     pass
 
 
-def _normalize_mapping(raw_mapping: Dict) -> Dict[str, Dict[str, List[str]]]:
+def normalize_concept_mapping(raw_mapping: Dict) -> Dict[str, Dict[str, List[str]]]:
     if "subjects" in raw_mapping:
         normalized: Dict[str, Dict[str, List[str]]] = {}
         for subject in raw_mapping["subjects"]:
@@ -64,27 +71,27 @@ def _subject_result_map(subjects: Iterable["SubjectResult"]) -> Dict[str, "Subje
 
 def analyze_results(
     subject_results: Iterable["SubjectResult"],
-    concept_mapping: Dict,
+    mapping: Dict[str, Dict[str, List[str]]],
 ) -> FullAnalysis:
-    mapping = _normalize_mapping(concept_mapping)
+    # The mapping comes from normalize_concept_mapping, built once per request
     subject_map = _subject_result_map(subject_results)
     analyses: List[SubjectAnalysis] = []
 
     for subject_name, areas in mapping.items():
-        if subject_name not in subject_map:
+        subject_result = subject_map.get(subject_name)
+        if subject_result is None:
             continue
-        subject_result = subject_map[subject_name]
         question_map = {q.question_id: q for q in subject_result.questions}
         area_results: List[LearningAreaResult] = []
         for area_name, question_ids in areas.items():
-            correct = 0
-            total = 0
-            for question_id in question_ids:
-                if question_id not in question_map:
-                    continue
-                total += 1
-                if question_map[question_id].is_correct:
-                    correct += 1
+            # Single lookup per question, unanswered ones map to None
+            answered = [
+                question
+                for question in map(question_map.get, question_ids)
+                if question is not None
+            ]
+            total = len(answered)
+            correct = sum(map(attrgetter("is_correct"), answered))
             percentage = (correct / total) if total else 0.0
             status = "Done well" if percentage >= THRESHOLD else "Needs improvement"
             area_results.append(
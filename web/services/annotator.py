@@ -42,10 +42,13 @@ def image_to_pdf_bytes(image: np.ndarray) -> bytes:
     if image is None:
         raise AnnotationError("Cannot convert empty image to PDF.")
     if len(image.shape) == 2:
-        rgb = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_GRAY2RGB))
     else:
-        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    pil_image = Image.fromarray(rgb)
+        # PIL unpacks the BGR pixels itself, so no RGB copy of the sheet is made
+        height, width = image.shape[:2]
+        pil_image = Image.frombuffer(
+            "RGB", (width, height), np.ascontiguousarray(image), "raw", "BGR", 0, 1
+        )
     buffer = BytesIO()
     pil_image.save(buffer, format="PDF")
     buffer.seek(0)
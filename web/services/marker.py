@@ -1,11 +1,11 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple, TYPE_CHECKING
 import csv
 import json
-import tempfile
 
 import cv2
 import numpy as np
@@ -18,9 +18,16 @@ if TYPE_CHECKING:
 
 PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
 
+ROOT_DIR = Path(__file__).resolve().parents[2]
+READING_TEMPLATE = ROOT_DIR / "config" / "aset_reading_template.json"
+QRAR_TEMPLATE = ROOT_DIR / "config" / "aset_qrar_template.json"
+
 
 @dataclass
 class QuestionResult:
+    # One instance per question of every marked sheet
+    __slots__ = ("question_id", "selected", "correct", "is_correct")
+
     question_id: str
     selected: str
     correct: str
@@ -29,6 +36,9 @@ class QuestionResult:
 
 @dataclass
 class SubjectResult:
+    # One instance per subject of every marked sheet
+    __slots__ = ("subject", "total", "correct", "questions")
+
     subject: str
     total: int
     correct: int
@@ -101,10 +111,11 @@ def _score_response(
     questions: List[QuestionResult] = []
     correct_count = 0
     for question_id in question_order:
-        if question_id not in answer_key:
+        # Single lookup for both the membership test and the value
+        correct = answer_key.get(question_id)
+        if correct is None:
             continue
         selected = response.get(question_id, "")
-        correct = answer_key.get(question_id, "")
         is_correct = selected == correct and selected != ""
         if is_correct:
             correct_count += 1
@@ -139,6 +150,12 @@ class MarkingService:
 
         self.reading_template = Template(reading_template_path, CONFIG_DEFAULTS)
         self.qrar_template = Template(qrar_template_path, CONFIG_DEFAULTS)
+        # The question split only depends on the template, not on the sheet
+        qrar_order = self.qrar_template.output_columns
+        self.qr_questions = _filter_questions(qrar_order, "QR")
+        self.ar_questions = _filter_questions(qrar_order, "AR")
+        # Reads the QR/AR sheet while the calling thread reads the reading sheet
+        self._qrar_executor = ThreadPoolExecutor(max_workers=1)
 
     def _read_response(self, template: "Template", image_bytes: bytes) -> Tuple[Dict[str, str], np.ndarray]:
         _validate_png(image_bytes)
@@ -151,13 +168,13 @@ class MarkingService:
         if image is None:
             raise MarkingError("Image alignment failed. Check scan quality and template.")
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            response_dict, marked_image, _, _ = template.image_instance_ops.read_omr_response(
-                template=template,
-                image=image,
-                name="uploaded",
-                save_dir=Path(temp_dir),
-            )
+        # Nothing is saved to disk here, the marked image is returned instead
+        response_dict, marked_image, _, _ = template.image_instance_ops.read_omr_response(
+            template=template,
+            image=image,
+            name="uploaded",
+            save_dir=None,
+        )
         response = get_concatenated_response(response_dict, template)
         return response, marked_image
 
@@ -174,11 +191,8 @@ class MarkingService:
 
     def mark_qrar(self, image_bytes: bytes, answer_key: Dict[str, str]) -> List[MarkedSheet]:
         response, marked_image = self._read_response(self.qrar_template, image_bytes)
-        question_order = self.qrar_template.output_columns
-        qr_questions = _filter_questions(question_order, "QR")
-        ar_questions = _filter_questions(question_order, "AR")
-        qr_result = _score_response("QR", response, answer_key, qr_questions)
-        ar_result = _score_response("AR", response, answer_key, ar_questions)
+        qr_result = _score_response("QR", response, answer_key, self.qr_questions)
+        ar_result = _score_response("AR", response, answer_key, self.ar_questions)
         return [
             MarkedSheet(
                 subject="QR",
@@ -193,3 +207,35 @@ class MarkingService:
                 marked_image=marked_image,
             ),
         ]
+
+    def mark_student(
+        self,
+        reading_bytes: bytes,
+        reading_key: Dict[str, str],
+        qrar_bytes: bytes,
+        qrar_key: Dict[str, str],
+    ) -> Tuple[MarkedSheet, List[MarkedSheet]]:
+        # The two sheets use separate templates, so they can be read side by side
+        # while OpenCV releases the GIL
+        qrar_future = self._qrar_executor.submit(self.mark_qrar, qrar_bytes, qrar_key)
+        try:
+            reading_marked = self.mark_reading(reading_bytes, reading_key)
+        finally:
+            # The QR/AR template must be idle again before the next student
+            wait([qrar_future])
+        return reading_marked, qrar_future.result()
+
+
+_SERVICE_CACHE: Dict[Tuple[Path, Path], MarkingService] = {}
+
+
+def get_marking_service(
+    reading_template_path: Path = READING_TEMPLATE,
+    qrar_template_path: Path = QRAR_TEMPLATE,
+) -> MarkingService:
+    key = (reading_template_path, qrar_template_path)
+    service = _SERVICE_CACHE.get(key)
+    if service is None:
+        service = MarkingService(reading_template_path, qrar_template_path)
+        _SERVICE_CACHE[key] = service
+    return service
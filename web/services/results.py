@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Dict, List, Union
+import json
+
+from web.services.analysis import FullAnalysis, analyze_results
+from web.services.annotator import annotate_sheet, image_to_pdf_bytes
+from web.services.marker import MarkedSheet, SubjectResult
+from web.services.report import generate_student_report
+
+
+def slugify(name: str) -> str:
+    return "_".join(part for part in name.strip().split() if part)
+
+
+def build_student_files(
+    student_name: str,
+    writing_score: int,
+    reading_marked: MarkedSheet,
+    qrar_marked_list: List[MarkedSheet],
+    concept_mapping: Dict[str, Dict[str, List[str]]],
+) -> Dict[str, Union[bytes, str]]:
+    """Returns the output files of a marked student, keyed by file name suffix."""
+    qrar_results = [marked.result for marked in qrar_marked_list]
+    analysis = analyze_results([reading_marked.result] + qrar_results, concept_mapping)
+
+    report_pdf = generate_student_report(
+        student_name=student_name,
+        writing_score=writing_score,
+        reading_result=reading_marked.result,
+        qrar_results=qrar_results,
+        analysis=analysis,
+    )
+    reading_pdf = image_to_pdf_bytes(
+        annotate_sheet(reading_marked.marked_image, reading_marked.result, "Reading")
+    )
+    combined_qrar_result = _combine_results(qrar_results)
+    qrar_pdf = image_to_pdf_bytes(
+        annotate_sheet(qrar_marked_list[0].marked_image, combined_qrar_result, "QR/AR")
+    )
+    results_payload = _build_results_json(
+        student_name,
+        writing_score,
+        reading_marked.result,
+        qrar_results,
+        analysis,
+    )
+
+    return {
+        "reading_marked.pdf": reading_pdf,
+        "qrar_marked.pdf": qrar_pdf,
+        "report.pdf": report_pdf,
+        "results.json": json.dumps(results_payload, indent=2),
+    }
+
+
+def _combine_results(results: List[SubjectResult]) -> SubjectResult:
+    total = correct = 0
+    questions = []
+    for result in results:
+        total += result.total
+        correct += result.correct
+        questions.extend(result.questions)
+    return SubjectResult(
+        subject="QR/AR", total=total, correct=correct, questions=questions
+    )
+
+
+def _build_results_json(
+    student_name: str,
+    writing_score: int,
+    reading_result: SubjectResult,
+    qrar_results: List[SubjectResult],
+    analysis: FullAnalysis,
+) -> Dict:
+    return {
+        "student": student_name,
+        "writing_score": writing_score,
+        "reading": _subject_to_dict(reading_result),
+        "qrar": {result.subject: _subject_to_dict(result) for result in qrar_results},
+        "analysis": {
+            subject.subject: [
+                {
+                    "area": area.name,
+                    "correct": area.correct,
+                    "total": area.total,
+                    "percentage": round(area.percentage * 100, 2),
+                    "status": area.status,
+                }
+                for area in subject.areas
+            ]
+            for subject in analysis.subjects
+        },
+    }
+
+
+def _subject_to_dict(subject: SubjectResult) -> Dict:
+    return {
+        "correct": subject.correct,
+        "total": subject.total,
+        "questions": [
+            {
+                "id": q.question_id,
+                "selected": q.selected,
+                "correct": q.correct,
+                "is_correct": q.is_correct,
+            }
+            for q in subject.questions
+        ],
+    }
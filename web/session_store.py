@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 import secrets
@@ -14,7 +14,7 @@ class SessionData:
     session_id: str
     created_at: datetime
     is_authenticated: bool = False
-    config: Dict[str, Any] = field(default_factory=dict)
+    config: Optional[Dict[str, Any]] = None
 
 
 class SessionStore: